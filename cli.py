@@ -52,7 +52,7 @@ def cmd_analyze_network(args):
     receipts = load_receipts()
     medicaid_receipts = [r for r in receipts if r.get('receipt_type') == 'medicaid_ingest']
 
-    graph = build_provider_graph(medicaid_receipts)
+    graph = build_provider_graph(medicaid_receipts, materialize_edges=False)
     clusters = detect_clusters(graph, min_size=3)
     entropy = compute_network_entropy(graph)
 
@@ -90,8 +90,8 @@ def cmd_run_simulation(args):
     summary = {
         "cycles_completed": result.cycle,
         "violations": len(result.violations),
-        "medicaid_receipts": len(result.medicaid_receipts),
-        "voucher_receipts": len(result.voucher_receipts),
+        "medicaid_receipts": result.n_medicaid_receipts,
+        "voucher_receipts": result.n_voucher_receipts,
         "detection_receipts": len(result.detection_receipts)
     }
     print(json.dumps(summary, indent=2))
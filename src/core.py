@@ -3,7 +3,9 @@ AzProof Core Module
 
 Foundation module providing:
 - dual_hash: SHA256:BLAKE3 dual hashing
+- canonical_bytes: Typed, length-prefixed byte encoding for hashing records
 - emit_receipt: Receipt creation with timestamps and hashes
+- emit_receipts_batch: Bulk receipt creation with a single ledger write
 - merkle: Merkle root computation
 - StopRule: Exception for stoprule violations
 - Constants and configuration
@@ -11,9 +13,12 @@ Foundation module providing:
 
 import hashlib
 import json
+import math
 import os
+import struct
+import sys
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 # Try to import blake3, fall back to hashlib.sha256 for second hash if not available
 try:
@@ -73,6 +78,12 @@ RECEIPT_SCHEMA = {
     "tenant_id": TENANT_ID
 }
 
+# Shared across receipts: json.dumps builds a new encoder per call when
+# given options, and the fallback hash prefix only needs hashing once
+_PAYLOAD_ENCODER = json.JSONEncoder(sort_keys=True, default=str)
+_LEDGER_ENCODER = json.JSONEncoder(default=str)
+_BLAKE3_FALLBACK_SEED = hashlib.sha256(b"blake3_fallback:")
+
 
 class StopRule(Exception):
     """
@@ -89,12 +100,12 @@ class StopRule(Exception):
         super().__init__(f"STOPRULE [{rule_name}]: {message}")
 
 
-def dual_hash(data: Union[bytes, str]) -> str:
+def dual_hash(data: Union[bytes, bytearray, memoryview, str]) -> str:
     """
     Compute dual hash in SHA256:BLAKE3 format.
 
     Args:
-        data: Input data as bytes or string
+        data: Input data as a bytes-like object or string
 
     Returns:
         Hash string in format "sha256_hex:blake3_hex"
@@ -112,11 +123,86 @@ def dual_hash(data: Union[bytes, str]) -> str:
         blake3_hash = blake3.blake3(data).hexdigest()
     else:
         # Fallback: use SHA256 with salt to differentiate
-        blake3_hash = hashlib.sha256(b"blake3_fallback:" + data).hexdigest()
+        fallback = _BLAKE3_FALLBACK_SEED.copy()
+        fallback.update(data)
+        blake3_hash = fallback.hexdigest()
 
     return f"{sha256_hash}:{blake3_hash}"
 
 
+def write_canonical(buf: bytearray, values: Iterable[Any]) -> None:
+    """
+    Append a canonical byte encoding of values to buf.
+
+    Each value is tagged with its type; strings are length-prefixed UTF-8,
+    ints are little-endian int64 (wider ints as length-prefixed decimal)
+    and floats IEEE-754 doubles. Lists/tuples and dicts are encoded
+    recursively, dicts as key/value pairs sorted by key, so a record's
+    encoding does not depend on key order. Distinct value sequences never
+    encode to the same bytes.
+
+    Args:
+        buf: Buffer to extend (reuse one across records to avoid churn)
+        values: Field values (None, bool, int, float, str, list, tuple,
+            dict; others via str() under their own tag)
+    """
+    for value in values:
+        if value is None:
+            buf += b"N"
+        elif value is True or value is False:
+            buf += b"T" if value else b"F"
+        elif isinstance(value, int):
+            if -(1 << 63) <= value < (1 << 63):
+                buf += b"I"
+                buf += struct.pack("<q", value)
+            else:
+                _write_tagged_text(buf, b"B", str(value))
+        elif isinstance(value, float):
+            buf += b"D"
+            buf += struct.pack("<d", value)
+        elif isinstance(value, str):
+            _write_tagged_text(buf, b"S", value)
+        elif isinstance(value, (list, tuple)):
+            buf += b"L"
+            buf += struct.pack("<I", len(value))
+            write_canonical(buf, value)
+        elif isinstance(value, dict):
+            buf += b"M"
+            buf += struct.pack("<I", len(value))
+            for key in sorted(value, key=_canonical_key_order):
+                write_canonical(buf, (key, value[key]))
+        else:
+            _write_tagged_text(buf, b"O", str(value))
+
+
+def _canonical_key_order(key: Any) -> Tuple[str, str]:
+    """Sort key for dict keys of mixed types."""
+    return type(key).__name__, str(key)
+
+
+def _write_tagged_text(buf: bytearray, tag: bytes, text: str) -> None:
+    """Append tag, byte length and UTF-8 text."""
+    encoded = text.encode("utf-8")
+    buf += tag
+    buf += struct.pack("<I", len(encoded))
+    buf += encoded
+
+
+def canonical_bytes(values: Iterable[Any]) -> bytes:
+    """
+    Canonical byte encoding of values (see write_canonical).
+
+    Args:
+        values: Field values
+
+    Returns:
+        Encoded bytes
+    """
+    buf = bytearray()
+    write_canonical(buf, values)
+    return bytes(buf)
+
+
 def emit_receipt(receipt_type: str, data: Dict[str, Any], tenant_id: str = TENANT_ID) -> Dict[str, Any]:
     """
     Create a receipt with timestamp, tenant_id, and payload hash.
@@ -131,27 +217,54 @@ def emit_receipt(receipt_type: str, data: Dict[str, Any], tenant_id: str = TENAN
 
     Also prints JSON to stdout for ledger capture.
     """
+    receipt = _build_receipt(receipt_type, data, tenant_id)
+
+    # Append to ledger
+    append_to_ledger(receipt)
+
+    return receipt
+
+
+def emit_receipts_batch(
+    receipt_type: str,
+    payloads: List[Dict[str, Any]],
+    tenant_id: str = TENANT_ID
+) -> List[Dict[str, Any]]:
+    """
+    Create one receipt per payload and append them to the ledger together.
+
+    Args:
+        receipt_type: Type of receipt shared by every payload
+        payloads: Payload data dicts, one per receipt
+        tenant_id: Tenant identifier (default: "azproof")
+
+    Returns:
+        List of complete receipts, in payload order
+    """
+    receipts = [_build_receipt(receipt_type, data, tenant_id) for data in payloads]
+    append_many_to_ledger(receipts)
+    return receipts
+
+
+def _build_receipt(receipt_type: str, data: Dict[str, Any], tenant_id: str) -> Dict[str, Any]:
+    """Stamp payload data with ts, tenant_id, and payload hash."""
     # Create timestamp
     ts = datetime.now(timezone.utc).isoformat()
 
     # Compute payload hash
-    payload_json = json.dumps(data, sort_keys=True, default=str)
+    payload_json = _PAYLOAD_ENCODER.encode(data)
     payload_hash = dual_hash(payload_json)
 
-    # Build receipt
-    receipt = {
-        "receipt_type": receipt_type,
+    # Build receipt; receipt_type is interned so the many receipts of one
+    # type share a single string object
+    return {
+        "receipt_type": sys.intern(receipt_type),
         "ts": ts,
         "tenant_id": tenant_id,
         **data,
         "payload_hash": payload_hash
     }
 
-    # Append to ledger
-    append_to_ledger(receipt)
-
-    return receipt
-
 
 def append_to_ledger(receipt: Dict[str, Any]) -> None:
     """
@@ -160,9 +273,22 @@ def append_to_ledger(receipt: Dict[str, Any]) -> None:
     Args:
         receipt: Receipt dict to append
     """
+    append_many_to_ledger([receipt])
+
+
+def append_many_to_ledger(receipts: List[Dict[str, Any]]) -> None:
+    """
+    Append receipts to the receipts.jsonl ledger with a single open/write.
+
+    Args:
+        receipts: Receipt dicts to append
+    """
+    if not receipts:
+        return
     try:
         with open(RECEIPTS_LEDGER_PATH, 'a') as f:
-            f.write(json.dumps(receipt, default=str) + '\n')
+            encode = _LEDGER_ENCODER.encode
+            f.write(''.join([encode(r) + '\n' for r in receipts]))
     except IOError:
         # If we can't write to ledger, continue (for testing scenarios)
         pass
@@ -213,22 +339,26 @@ def merkle(items: List[Union[str, bytes, Dict]]) -> str:
     hashes = []
     for item in items:
         if isinstance(item, dict):
-            item = json.dumps(item, sort_keys=True, default=str)
+            item = _PAYLOAD_ENCODER.encode(item)
         if isinstance(item, str):
             item = item.encode('utf-8')
         hashes.append(dual_hash(item))
 
-    # Build Merkle tree
-    while len(hashes) > 1:
-        if len(hashes) % 2 == 1:
+    # Build Merkle tree in place: each level's parents overwrite the front
+    # of the same list (parent i only reads children 2i and 2i+1)
+    n = len(hashes)
+    while n > 1:
+        if n % 2 == 1:
             # Odd count: duplicate last hash
-            hashes.append(hashes[-1])
+            if n == len(hashes):
+                hashes.append(hashes[n - 1])
+            else:
+                hashes[n] = hashes[n - 1]
+            n += 1
 
-        new_level = []
-        for i in range(0, len(hashes), 2):
-            combined = hashes[i] + hashes[i + 1]
-            new_level.append(dual_hash(combined))
-        hashes = new_level
+        for i in range(n // 2):
+            hashes[i] = dual_hash(hashes[2 * i] + hashes[2 * i + 1])
+        n //= 2
 
     return hashes[0]
 
@@ -309,6 +439,33 @@ def validate_receipt(receipt: Dict[str, Any]) -> tuple:
     return True, "valid"
 
 
+def mean_std(values: Iterable[float]) -> Tuple[float, float]:
+    """
+    Mean and population standard deviation in one pass (Welford).
+
+    Std is 1.0 for fewer than two values, so callers can divide by it.
+
+    Args:
+        values: Numbers to summarize (any iterable, consumed once)
+
+    Returns:
+        Tuple of (mean, std); mean is 0.0 for no values
+    """
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    for value in values:
+        n += 1
+        delta = value - mean
+        mean += delta / n
+        m2 += delta * (value - mean)
+
+    if n < 2:
+        return mean, 1.0
+
+    return mean, math.sqrt(m2 / n)
+
+
 def get_risk_level(score: float) -> str:
     """
     Convert numeric risk score to level.
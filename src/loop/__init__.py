@@ -14,23 +14,23 @@ The LOOP Cycle (every 60 seconds):
 """
 
 from .cycle import run_cycle, start_loop, stop_loop
-from .sense import sense_receipts, query_recent, filter_by_type
+from .sense import sense_receipts, query_recent, filter_by_type, index_by_type
 from .harvest import harvest_gaps, rank_gaps, identify_patterns
 from .genesis import synthesize_helper, validate_blueprint, estimate_savings
-from .gate import calculate_risk, request_approval, check_approval, auto_approve
+from .gate import calculate_risk, calculate_risk_batch, request_approval, check_approval, auto_approve
 from .effectiveness import measure_effectiveness, track_helper, retire_helper
 
 __all__ = [
     # cycle
     'run_cycle', 'start_loop', 'stop_loop',
     # sense
-    'sense_receipts', 'query_recent', 'filter_by_type',
+    'sense_receipts', 'query_recent', 'filter_by_type', 'index_by_type',
     # harvest
     'harvest_gaps', 'rank_gaps', 'identify_patterns',
     # genesis
     'synthesize_helper', 'validate_blueprint', 'estimate_savings',
     # gate
-    'calculate_risk', 'request_approval', 'check_approval', 'auto_approve',
+    'calculate_risk', 'calculate_risk_batch', 'request_approval', 'check_approval', 'auto_approve',
     # effectiveness
     'measure_effectiveness', 'track_helper', 'retire_helper'
 ]
@@ -4,6 +4,7 @@ Helper Effectiveness Measurement Module
 Tracks and measures helper performance.
 """
 
+from array import array
 from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
@@ -36,13 +37,23 @@ def register_helper(blueprint: Dict) -> str:
         "successes": 0,
         "failures": 0,
         "total_time_saved_ms": 0,
-        "entropy_before": [],
-        "entropy_after": []
+        # Per-execution entropy readings, packed as doubles
+        "entropy_before": array("d"),
+        "entropy_after": array("d")
     }
 
     return helper_id
 
 
+def _helper_state(helper: Dict) -> Dict:
+    """Copy of a helper's state with its entropy readings as plain lists."""
+    return {
+        **helper,
+        "entropy_before": list(helper["entropy_before"]),
+        "entropy_after": list(helper["entropy_after"])
+    }
+
+
 def record_execution(
     helper_id: str,
     success: bool,
@@ -60,10 +71,10 @@ def record_execution(
         entropy_before: Entropy before execution
         entropy_after: Entropy after execution
     """
-    if helper_id not in _helpers:
+    helper = _helpers.get(helper_id)
+    if helper is None:
         return
 
-    helper = _helpers[helper_id]
     helper["executions"] += 1
 
     if success:
@@ -181,7 +192,7 @@ def retire_helper(helper_id: str, reason: str) -> Dict:
         "final_metrics": track_helper(helper_id)
     })
 
-    return helper
+    return _helper_state(helper)
 
 
 def get_active_helpers() -> List[Dict]:
@@ -192,7 +203,7 @@ def get_active_helpers() -> List[Dict]:
         List of active helper states
     """
     return [
-        h for h in _helpers.values()
+        _helper_state(h) for h in _helpers.values()
         if h.get("status") == "active"
     ]
 
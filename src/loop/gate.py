@@ -5,6 +5,7 @@ Manages approval workflow for helper deployment.
 """
 
 import uuid
+from functools import lru_cache
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
@@ -16,6 +17,10 @@ RISK_AUTO_APPROVE = 0.2
 RISK_SINGLE_APPROVAL = 0.5
 RISK_DOUBLE_APPROVAL = 0.8
 
+# Base risk and the adjustment for each keyword found in an action type
+RISK_BASE = 0.3
+ACTION_KEYWORD_RISK = (("delete", 0.3), ("modify", 0.2), ("alert", -0.1))
+
 # In-memory approval store (would be database in production)
 _approvals: Dict[str, Dict] = {}
 
@@ -30,18 +35,8 @@ def calculate_risk(action: Dict) -> float:
     Returns:
         Risk score 0-1
     """
-    # Start with base risk
-    risk = 0.3
-
-    # Adjust based on action type
-    action_type = action.get("action", "")
-
-    if "delete" in action_type.lower():
-        risk += 0.3
-    if "modify" in action_type.lower():
-        risk += 0.2
-    if "alert" in action_type.lower():
-        risk -= 0.1
+    # Base risk adjusted by action type
+    risk = _action_type_risk(action.get("action", ""))
 
     # Adjust based on validation
     validation = action.get("validation", {})
@@ -68,18 +63,44 @@ def calculate_risk(action: Dict) -> float:
     return max(0.0, min(1.0, risk))
 
 
-def request_approval(blueprint: Dict) -> str:
+@lru_cache(maxsize=256)
+def _action_type_risk(action_type: str) -> float:
+    """Base risk plus keyword adjustments; action types repeat, so cached."""
+    risk = RISK_BASE
+    action_lc = action_type.lower()
+    for keyword, adjustment in ACTION_KEYWORD_RISK:
+        if keyword in action_lc:
+            risk += adjustment
+    return risk
+
+
+def calculate_risk_batch(actions: List[Dict]) -> List[float]:
+    """
+    Risk scores for many actions.
+
+    Args:
+        actions: Action dicts (blueprints or other actions)
+
+    Returns:
+        Risk scores 0-1, in input order
+    """
+    return [calculate_risk(action) for action in actions]
+
+
+def request_approval(blueprint: Dict, risk: Optional[float] = None) -> str:
     """
     Submit blueprint for approval. Return approval_id.
 
     Args:
         blueprint: Helper blueprint to approve
+        risk: calculate_risk(blueprint), if already computed
 
     Returns:
         Approval ID
     """
     approval_id = str(uuid.uuid4())
-    risk = calculate_risk(blueprint)
+    if risk is None:
+        risk = calculate_risk(blueprint)
 
     # Determine required approvals
     if risk >= RISK_DOUBLE_APPROVAL:
@@ -128,10 +149,11 @@ def check_approval(approval_id: str) -> str:
     Returns:
         Status string
     """
-    if approval_id not in _approvals:
+    approval = _approvals.get(approval_id)
+    if approval is None:
         return "not_found"
 
-    return _approvals[approval_id].get("status", "pending")
+    return approval.get("status", "pending")
 
 
 def approve(approval_id: str, approver: str = "system") -> Dict:
@@ -145,11 +167,10 @@ def approve(approval_id: str, approver: str = "system") -> Dict:
     Returns:
         Updated approval state
     """
-    if approval_id not in _approvals:
+    approval = _approvals.get(approval_id)
+    if approval is None:
         return {"error": "not_found"}
 
-    approval = _approvals[approval_id]
-
     if approval["status"] != "pending":
         return {"error": f"already_{approval['status']}"}
 
@@ -186,11 +207,10 @@ def reject(approval_id: str, rejector: str = "system", reason: str = "") -> Dict
     Returns:
         Updated approval state
     """
-    if approval_id not in _approvals:
+    approval = _approvals.get(approval_id)
+    if approval is None:
         return {"error": "not_found"}
 
-    approval = _approvals[approval_id]
-
     if approval["status"] != "pending":
         return {"error": f"already_{approval['status']}"}
 
@@ -223,7 +243,7 @@ def auto_approve(blueprint: Dict) -> bool:
 
     if risk < RISK_AUTO_APPROVE:
         # Auto-approve
-        approval_id = request_approval(blueprint)
+        approval_id = request_approval(blueprint, risk=risk)
         approve(approval_id, approver="auto_approve_system")
         return True
 
@@ -245,5 +265,4 @@ def get_pending_approvals() -> List[Dict]:
 
 def clear_approvals() -> None:
     """Clear all approvals (for testing)."""
-    global _approvals
-    _approvals = {}
+    _approvals.clear()
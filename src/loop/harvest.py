@@ -4,7 +4,9 @@ Gap Collection Module
 Collects and analyzes manual intervention gaps.
 """
 
-from collections import defaultdict
+import heapq
+import sys
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 
@@ -37,35 +39,48 @@ def harvest_gaps(days: int = 7) -> List[Dict]:
     return gaps
 
 
-def rank_gaps(gaps: List[Dict]) -> List[Dict]:
+def rank_gaps(gaps: List[Dict], top_k: Optional[int] = None) -> List[Dict]:
     """
     Rank gaps by frequency x resolution_time.
 
     Args:
         gaps: List of gap receipts
+        top_k: Only return the top_k highest-scoring problem types
+            (selected without sorting them all)
 
     Returns:
         Ranked list of gaps
     """
-    # Group by problem_type
-    problem_groups: Dict[str, List[Dict]] = defaultdict(list)
+    # Group by problem_type, accumulating every per-type aggregate in the
+    # same pass: [gaps, resolution time sum, timed count, could_automate,
+    # max confidence]
+    problem_groups: Dict[str, List[Any]] = {}
 
     for gap in gaps:
         problem_type = gap.get("problem_type", "unknown")
-        problem_groups[problem_type].append(gap)
+        confidence = gap.get("automation_confidence", 0)
+        agg = problem_groups.get(problem_type)
+        if agg is None:
+            agg = problem_groups[problem_type] = [[], 0, 0, False, confidence]
+        elif confidence > agg[4]:
+            agg[4] = confidence
+
+        agg[0].append(gap)
+        resolve_ms = gap.get("time_to_resolve_ms", 0)
+        if resolve_ms:
+            agg[1] += resolve_ms
+            agg[2] += 1
+        if not agg[3] and gap.get("could_automate"):
+            agg[3] = True
 
     # Calculate ranking score for each problem type
     ranked = []
 
-    for problem_type, group in problem_groups.items():
+    for problem_type, (group, resolve_sum, n_timed, could_automate, max_confidence) in problem_groups.items():
         frequency = len(group)
 
         # Average resolution time
-        resolution_times = [
-            g.get("time_to_resolve_ms", 0) for g in group
-            if g.get("time_to_resolve_ms")
-        ]
-        avg_resolution = sum(resolution_times) / len(resolution_times) if resolution_times else 0
+        avg_resolution = resolve_sum / n_timed if n_timed else 0
 
         # Score = frequency * avg_resolution (higher = more impactful to automate)
         score = frequency * (avg_resolution / 1000)  # Convert to seconds
@@ -76,13 +91,13 @@ def rank_gaps(gaps: List[Dict]) -> List[Dict]:
             "avg_resolution_ms": avg_resolution,
             "score": score,
             "gaps": group,
-            "could_automate": any(g.get("could_automate") for g in group),
-            "automation_confidence": max(
-                (g.get("automation_confidence", 0) for g in group),
-                default=0
-            )
+            "could_automate": could_automate,
+            "automation_confidence": max_confidence
         })
 
+    if top_k is not None:
+        return heapq.nlargest(top_k, ranked, key=lambda x: x["score"])
+
     # Sort by score descending
     return sorted(ranked, key=lambda x: x["score"], reverse=True)
 
@@ -98,44 +113,50 @@ def identify_patterns(gaps: List[Dict], min_count: int = 3) -> List[Dict]:
     Returns:
         List of identified patterns
     """
+    # Count each domain/problem_type key first, so the per-pattern gap
+    # lists and step sets are only built for keys that reach min_count
+    keys = [
+        f"{gap.get('domain', 'unknown')}:{gap.get('problem_type', 'unknown')}"
+        for gap in gaps
+    ]
+    counts = Counter(keys)
+
     # Group by problem_type and domain
     patterns: Dict[str, Dict[str, Any]] = {}
 
-    for gap in gaps:
-        problem_type = gap.get("problem_type", "unknown")
-        domain = gap.get("domain", "unknown")
-        key = f"{domain}:{problem_type}"
+    for gap, key in zip(gaps, keys):
+        if counts[key] < min_count:
+            continue
 
-        if key not in patterns:
-            patterns[key] = {
+        pattern = patterns.get(key)
+        if pattern is None:
+            pattern = patterns[key] = {
                 "key": key,
-                "problem_type": problem_type,
-                "domain": domain,
+                "problem_type": gap.get("problem_type", "unknown"),
+                "domain": gap.get("domain", "unknown"),
                 "count": 0,
                 "gaps": [],
                 "resolution_steps": set(),
                 "could_automate_votes": 0
             }
 
-        patterns[key]["count"] += 1
-        patterns[key]["gaps"].append(gap)
+        pattern["count"] += 1
+        pattern["gaps"].append(gap)
 
         # Collect resolution steps
-        for step in gap.get("resolution_steps", []):
-            patterns[key]["resolution_steps"].add(step)
+        pattern["resolution_steps"].update(gap.get("resolution_steps", []))
 
         if gap.get("could_automate"):
-            patterns[key]["could_automate_votes"] += 1
+            pattern["could_automate_votes"] += 1
 
-    # Filter by min_count and convert sets
+    # Convert sets
     result = []
     for pattern in patterns.values():
-        if pattern["count"] >= min_count:
-            pattern["resolution_steps"] = list(pattern["resolution_steps"])
-            pattern["automation_likelihood"] = (
-                pattern["could_automate_votes"] / pattern["count"]
-            )
-            result.append(pattern)
+        pattern["resolution_steps"] = list(pattern["resolution_steps"])
+        pattern["automation_likelihood"] = (
+            pattern["could_automate_votes"] / pattern["count"]
+        )
+        result.append(pattern)
 
     return sorted(result, key=lambda x: x["count"], reverse=True)
 
@@ -165,8 +186,8 @@ def emit_gap(
         Gap receipt
     """
     receipt_data = {
-        "problem_type": problem_type,
-        "domain": domain,
+        "problem_type": sys.intern(problem_type),
+        "domain": sys.intern(domain),
         "time_to_resolve_ms": time_to_resolve_ms,
         "resolution_steps": resolution_steps,
         "could_automate": could_automate,
@@ -4,10 +4,153 @@ Receipt Stream Sensing Module
 Query and filter the receipt stream for recent activity.
 """
 
+import json
+import os
+import sys
+from bisect import bisect_left
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 
-from ..core import load_receipts, TENANT_ID
+from .. import core
+from ..core import TENANT_ID
+
+
+# Receipt types belonging to each domain
+DOMAIN_TYPES: Dict[str, List[str]] = {
+    "medicaid": [
+        "medicaid_ingest", "medicaid_batch_ingest",
+        "network_analysis", "aihp_flag", "shell_detection", "billing_anomaly"
+    ],
+    "voucher": [
+        "voucher_ingest", "voucher_batch_ingest",
+        "voucher_category", "merchant_flag", "voucher_pattern"
+    ],
+    "fiscal": [
+        "revenue_ingest", "policy_ingest", "policy_tracking", "fiscal_analysis"
+    ],
+    "entropy": [
+        "entropy_analysis"
+    ],
+    "loop": [
+        "gap", "helper_blueprint", "loop_cycle"
+    ]
+}
+
+
+# Bytes kept from just before the cached offset to detect a rewritten ledger
+_TAIL_CHECK_BYTES = 64
+
+
+@dataclass
+class _LedgerTail:
+    """
+    Recent receipts parsed from the ledger, extended as the file grows.
+
+    The ledger is append-only, so each load reads and parses only the
+    complete lines written since the previous one. Receipts older than the
+    requested cutoff are dropped, so the cache holds one query window; a
+    later load reaching further back than that reads the ledger again, as
+    does one that finds the ledger shrank, was replaced, or no longer ends
+    in the bytes seen last time.
+    """
+
+    path: Optional[str] = None
+    inode: Optional[int] = None
+    offset: int = 0
+    check: bytes = b""
+    horizon: str = ""
+    in_order: bool = True
+    stamps: List[str] = field(default_factory=list)
+    receipts: List[Dict] = field(default_factory=list)
+
+    def load(self, path: str, cutoff: str = "") -> List[Dict]:
+        """
+        Receipts in the ledger at path with ts >= cutoff, in file order.
+
+        The dicts are shared with the cache; callers must copy before
+        handing them out.
+        """
+        try:
+            with open(path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                if cutoff < self.horizon or not self._still_valid(path, st, f):
+                    self._reset(path, st.st_ino)
+
+                f.seek(self.offset)
+                data = f.read()
+        except FileNotFoundError:
+            self._reset(None, None)
+            return []
+
+        # Cache complete lines only; a trailing partial line is parsed
+        # fresh each time until its newline is written
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            line = line.strip()
+            if line:
+                receipt = _parse_receipt(line)
+                ts = receipt.get("ts", "")
+                if ts >= cutoff:
+                    if self.stamps and ts < self.stamps[-1]:
+                        self.in_order = False
+                    self.stamps.append(ts)
+                    self.receipts.append(receipt)
+        if end:
+            self.offset += end
+            self.check = (self.check + data[:end])[-_TAIL_CHECK_BYTES:]
+
+        self._drop_before(cutoff)
+
+        rest = data[end:].strip()
+        if rest:
+            receipt = _parse_receipt(rest)
+            if receipt.get("ts", "") >= cutoff:
+                return self.receipts + [receipt]
+        return self.receipts
+
+    def _drop_before(self, cutoff: str) -> None:
+        """Drop cached receipts with ts < cutoff and advance the horizon."""
+        if self.in_order:
+            # Receipts are appended in ts order, so the window is a suffix
+            start = bisect_left(self.stamps, cutoff)
+            del self.stamps[:start]
+            del self.receipts[:start]
+        else:
+            keep = [i for i, ts in enumerate(self.stamps) if ts >= cutoff]
+            self.stamps = [self.stamps[i] for i in keep]
+            self.receipts = [self.receipts[i] for i in keep]
+        self.horizon = cutoff
+
+    def _reset(self, path: Optional[str], inode: Optional[int]) -> None:
+        """Forget everything cached and start again from offset 0."""
+        self.path, self.inode, self.offset = path, inode, 0
+        self.check = b""
+        self.horizon = ""
+        self.in_order = True
+        self.stamps = []
+        self.receipts = []
+
+    def _still_valid(self, path: str, st: os.stat_result, f: Any) -> bool:
+        """Whether the cached receipts are a prefix of the file's contents."""
+        if path != self.path or st.st_ino != self.inode or st.st_size < self.offset:
+            return False
+        if not self.check:
+            return self.offset == 0
+        f.seek(self.offset - len(self.check))
+        return f.read(len(self.check)) == self.check
+
+
+_LEDGER_TAIL = _LedgerTail()
+
+
+def _parse_receipt(line: bytes) -> Dict:
+    """Parse one ledger line, interning its receipt_type."""
+    receipt = json.loads(line)
+    rtype = receipt.get("receipt_type")
+    if type(rtype) is str:
+        receipt["receipt_type"] = sys.intern(rtype)
+    return receipt
 
 
 def sense_receipts(
@@ -26,19 +169,20 @@ def sense_receipts(
     Returns:
         List of recent receipts
     """
-    all_receipts = load_receipts()
-
     # Calculate cutoff time
     cutoff = datetime.now(timezone.utc) - timedelta(minutes=since_minutes)
     cutoff_str = cutoff.isoformat()
 
-    # Filter by time and tenant
+    # Only receipts appended since the last call are read and parsed;
+    # the ledger path is looked up per call so it can be redirected
+    window = _LEDGER_TAIL.load(core.RECEIPTS_LEDGER_PATH, cutoff_str)
+
+    # Filter by tenant and type, copying so callers can't alter the cache
     recent = []
-    for receipt in all_receipts:
-        ts = receipt.get("ts", "")
-        if ts >= cutoff_str and receipt.get("tenant_id") == tenant_id:
+    for receipt in window:
+        if receipt.get("tenant_id") == tenant_id:
             if receipt_types is None or receipt.get("receipt_type") in receipt_types:
-                recent.append(receipt)
+                recent.append(dict(receipt))
 
     return recent
 
@@ -70,7 +214,8 @@ def query_recent(
 
 def filter_by_type(
     receipts: List[Dict],
-    receipt_type: str
+    receipt_type: str,
+    index: Optional[Dict[Any, List[Dict]]] = None
 ) -> List[Dict]:
     """
     Filter receipts by type.
@@ -78,13 +223,42 @@ def filter_by_type(
     Args:
         receipts: List of receipts
         receipt_type: Type to filter by
+        index: Result of index_by_type(receipts), if already built
 
     Returns:
         Filtered list
     """
+    if type(receipt_type) is str:
+        receipt_type = sys.intern(receipt_type)
+    if index is not None:
+        return list(index.get(receipt_type, ()))
     return [r for r in receipts if r.get("receipt_type") == receipt_type]
 
 
+def index_by_type(receipts: List[Dict]) -> Dict[Any, List[Dict]]:
+    """
+    Group receipts by receipt_type in one pass.
+
+    Build once and pass as filter_by_type(..., index=...) when filtering
+    the same receipts for several types.
+
+    Args:
+        receipts: List of receipts
+
+    Returns:
+        Dict mapping receipt_type to receipts, in input order
+    """
+    index: Dict[Any, List[Dict]] = {}
+    for receipt in receipts:
+        rtype = receipt.get("receipt_type")
+        bucket = index.get(rtype)
+        if bucket is None:
+            index[rtype] = [receipt]
+        else:
+            bucket.append(receipt)
+    return index
+
+
 def filter_by_domain(
     receipts: List[Dict],
     domain: str
@@ -99,27 +273,7 @@ def filter_by_domain(
     Returns:
         Filtered list
     """
-    domain_types = {
-        "medicaid": [
-            "medicaid_ingest", "medicaid_batch_ingest",
-            "network_analysis", "aihp_flag", "shell_detection", "billing_anomaly"
-        ],
-        "voucher": [
-            "voucher_ingest", "voucher_batch_ingest",
-            "voucher_category", "merchant_flag", "voucher_pattern"
-        ],
-        "fiscal": [
-            "revenue_ingest", "policy_ingest", "policy_tracking", "fiscal_analysis"
-        ],
-        "entropy": [
-            "entropy_analysis"
-        ],
-        "loop": [
-            "gap", "helper_blueprint", "loop_cycle"
-        ]
-    }
-
-    valid_types = domain_types.get(domain, [])
+    valid_types = DOMAIN_TYPES.get(domain, [])
     return [r for r in receipts if r.get("receipt_type") in valid_types]
 
 
@@ -154,15 +308,15 @@ def summarize_activity(minutes: int = 60) -> Dict[str, Any]:
     """
     receipts = sense_receipts(since_minutes=minutes)
 
+    # Domain counts come from the per-type counts; receipts are scanned once
+    by_type = count_by_type(receipts)
+
     return {
         "period_minutes": minutes,
         "total_receipts": len(receipts),
-        "by_type": count_by_type(receipts),
+        "by_type": by_type,
         "domains": {
-            "medicaid": len(filter_by_domain(receipts, "medicaid")),
-            "voucher": len(filter_by_domain(receipts, "voucher")),
-            "fiscal": len(filter_by_domain(receipts, "fiscal")),
-            "entropy": len(filter_by_domain(receipts, "entropy")),
-            "loop": len(filter_by_domain(receipts, "loop"))
+            domain: sum(by_type.get(rtype, 0) for rtype in types)
+            for domain, types in DOMAIN_TYPES.items()
         }
     }
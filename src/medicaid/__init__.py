@@ -11,7 +11,7 @@ Key Arizona-Specific Patterns:
 - Patient Recruitment: Pay for referrals
 """
 
-from .ingest import ingest_claim, batch_ingest, validate_claim
+from .ingest import ingest_claim, batch_ingest, batch_validate, validate_claim
 from .network import (
     build_provider_graph,
     detect_clusters,
@@ -42,7 +42,7 @@ from .shell import (
 
 __all__ = [
     # ingest
-    'ingest_claim', 'batch_ingest', 'validate_claim',
+    'ingest_claim', 'batch_ingest', 'batch_validate', 'validate_claim',
     # network
     'build_provider_graph', 'detect_clusters', 'compute_network_entropy',
     'flag_hub_providers', 'trace_referral_chains',
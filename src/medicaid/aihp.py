@@ -5,6 +5,7 @@ AIHP is fee-for-service (not managed care), making it vulnerable to
 billing without utilization controls. This module detects exploitation patterns.
 """
 
+import re
 from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
@@ -17,6 +18,14 @@ from ..core import (
 )
 
 
+# Known non-reservation urban areas, matched as substrings of the
+# lowercased facility address
+URBAN_INDICATORS = ("phoenix", "tucson", "scottsdale", "mesa", "tempe", "chandler", "gilbert")
+
+# One alternation scans each address once instead of once per indicator
+_URBAN_PATTERN = re.compile("|".join(map(re.escape, URBAN_INDICATORS)))
+
+
 def flag_aihp_claims(receipts: List[Dict]) -> List[Dict]:
     """
     Filter claims with tribal affiliation.
@@ -64,12 +73,8 @@ def detect_geographic_mismatch(claims: List[Dict], reservations: Optional[List[D
 
         facility_address = claim.get("facility_address", "").lower()
 
-        # Check if facility is in known non-reservation urban areas
-        urban_indicators = ["phoenix", "tucson", "scottsdale", "mesa", "tempe", "chandler", "gilbert"]
-        is_urban = any(ind in facility_address for ind in urban_indicators)
-
         # Flag if urban location billing AIHP
-        if is_urban:
+        if _URBAN_PATTERN.search(facility_address):
             flagged.append({
                 **claim,
                 "mismatch_reason": "urban_location",
@@ -4,9 +4,9 @@ Billing Anomaly Detection Module
 Detects billing anomalies: ghost claims, impossible volumes, pattern deviation.
 """
 
-import gzip
 import json
 import math
+import zlib
 from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
@@ -16,10 +16,19 @@ from ..core import (
     TENANT_ID,
     MAX_PATIENTS_PER_PROVIDER_DAY,
     COMPRESSION_FRAUD_THRESHOLD,
-    get_risk_level
+    get_risk_level,
+    mean_std
 )
 
 
+# Shared by every compression_ratio_billing call
+_PATTERN_ENCODER = json.JSONEncoder(sort_keys=True)
+
+# zlib window bits selecting gzip framing (header and trailer sizes match
+# gzip.compress)
+_GZIP_WBITS = 31
+
+
 def compute_billing_velocity(
     provider_id: str,
     receipts: List[Dict],
@@ -97,20 +106,22 @@ def compression_ratio_billing(claims: List[Dict]) -> float:
     if not claims:
         return 1.0
 
-    # Extract key billing patterns
-    patterns = []
-    for claim in claims:
-        pattern = {
-            "provider_id": claim.get("provider_id"),
-            "service_type": claim.get("service_type"),
+    # Extract key billing patterns; keys already in sorted order
+    patterns = [
+        {
+            "billed_amount": claim.get("billed_amount"),
             "facility_type": claim.get("facility_type"),
-            "billed_amount": claim.get("billed_amount")
+            "provider_id": claim.get("provider_id"),
+            "service_type": claim.get("service_type")
         }
-        patterns.append(pattern)
+        for claim in claims
+    ]
 
-    # Serialize and compress
-    original = json.dumps(patterns, sort_keys=True).encode('utf-8')
-    compressed = gzip.compress(original)
+    # Serialize and compress; the same bytes and gzip-framed size as
+    # json.dumps(sort_keys=True) + gzip.compress, without rebuilding an
+    # encoder per call or the gzip module's header handling
+    original = _PATTERN_ENCODER.encode(patterns).encode('utf-8')
+    compressed = zlib.compress(original, 9, _GZIP_WBITS)
 
     return len(compressed) / len(original)
 
@@ -126,19 +137,23 @@ def detect_upcoding(claims: List[Dict], threshold: float = 0.8) -> List[Dict]:
     Returns:
         List of flagged upcoding patterns
     """
-    # Group by provider
-    provider_claims: Dict[str, List[Dict]] = defaultdict(list)
+    # Group claim counts and nonzero billed amounts by provider in one pass
+    claim_counts: Dict[str, int] = defaultdict(int)
+    provider_amounts: Dict[str, List[Any]] = defaultdict(list)
 
     for claim in claims:
         provider_id = claim.get("provider_id")
         if provider_id:
-            provider_claims[provider_id].append(claim)
+            claim_counts[provider_id] += 1
+            amount = claim.get("billed_amount")
+            if amount:
+                provider_amounts[provider_id].append(amount)
 
     flagged = []
 
-    for provider_id, claims_list in provider_claims.items():
+    for provider_id, claim_count in claim_counts.items():
         # Analyze billed amounts
-        amounts = [c.get("billed_amount", 0) for c in claims_list if c.get("billed_amount")]
+        amounts = provider_amounts.get(provider_id, ())
 
         if len(amounts) < 10:  # Need minimum claims
             continue
@@ -147,13 +162,13 @@ def detect_upcoding(claims: List[Dict], threshold: float = 0.8) -> List[Dict]:
         max_amount = max(amounts)
         high_tier_threshold = max_amount * 0.8  # Within 80% of max
 
-        high_tier_count = sum(1 for a in amounts if a >= high_tier_threshold)
+        high_tier_count = len([a for a in amounts if a >= high_tier_threshold])
         high_tier_ratio = high_tier_count / len(amounts)
 
         if high_tier_ratio >= threshold:
             flagged.append({
                 "provider_id": provider_id,
-                "claim_count": len(claims_list),
+                "claim_count": claim_count,
                 "high_tier_ratio": high_tier_ratio,
                 "max_amount": max_amount,
                 "pattern_type": "upcoding"
@@ -202,11 +217,15 @@ def compare_to_baseline(
         providers = set(c.get("provider_id") for c in all_claims if c.get("provider_id"))
         velocities = [compute_billing_velocity(p, receipts, "day") for p in providers]
 
+        # One pass each for mean and std
+        avg_velocity, std_velocity = mean_std(velocities)
+        avg_amount, std_amount = mean_std(all_amounts)
+
         baseline = {
-            "avg_velocity": sum(velocities) / len(velocities) if velocities else 0,
-            "std_velocity": _std(velocities) if velocities else 1,
-            "avg_amount": sum(all_amounts) / len(all_amounts) if all_amounts else 0,
-            "std_amount": _std(all_amounts) if all_amounts else 1
+            "avg_velocity": avg_velocity,
+            "std_velocity": std_velocity,
+            "avg_amount": avg_amount,
+            "std_amount": std_amount
         }
 
     # Compute deviations
@@ -225,15 +244,6 @@ def compare_to_baseline(
     }
 
 
-def _std(values: List[float]) -> float:
-    """Calculate standard deviation."""
-    if not values or len(values) < 2:
-        return 1.0
-    mean = sum(values) / len(values)
-    variance = sum((v - mean) ** 2 for v in values) / len(values)
-    return math.sqrt(variance)
-
-
 def analyze_billing_anomalies(
     provider_id: str,
     receipts: List[Dict],
@@ -7,7 +7,7 @@ Ingests AHCCCS claim data into the receipts stream.
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
-from ..core import emit_receipt, dual_hash, merkle, TENANT_ID
+from ..core import emit_receipt, emit_receipts_batch, dual_hash, merkle, write_canonical, TENANT_ID
 
 
 # Required fields for a valid claim
@@ -30,55 +30,158 @@ OPTIONAL_CLAIM_FIELDS = [
 ]
 
 
-def validate_claim(claim: Dict[str, Any]) -> Tuple[bool, str]:
+def _canonical_claim_bytes(claim: Dict[str, Any], buf: Optional[bytearray] = None) -> bytearray:
     """
-    Check required fields and format of a claim.
+    Canonical bytes of a whole claim (every key/value, sorted by key).
+
+    Args:
+        claim: Claim dictionary
+        buf: Optional scratch buffer, cleared and reused
+
+    Returns:
+        Buffer holding the encoding
+    """
+    if buf is None:
+        buf = bytearray()
+    else:
+        del buf[:]
+    write_canonical(buf, (claim,))
+    return buf
+
+
+def _claim_reason(
+    claim: Dict[str, Any],
+    date_cache: Optional[Dict[str, bool]] = None,
+    strict_dates: bool = True
+) -> Optional[str]:
+    """
+    First validation failure for a claim, or None if it is valid.
 
     Args:
         claim: Claim dictionary to validate
+        date_cache: Optional map of service_date string to parse result,
+            shared across calls so each distinct date is parsed once
+        strict_dates: Check service_date format (False skips date parsing)
 
     Returns:
-        Tuple of (valid: bool, reason: str)
+        Failure reason, or None
     """
     for field in REQUIRED_CLAIM_FIELDS:
         if field not in claim:
-            return False, f"Missing required field: {field}"
+            return f"Missing required field: {field}"
 
     # Validate claim_id is non-empty
     if not claim.get("claim_id"):
-        return False, "claim_id cannot be empty"
+        return "claim_id cannot be empty"
 
     # Validate provider_id is non-empty
     if not claim.get("provider_id"):
-        return False, "provider_id cannot be empty"
+        return "provider_id cannot be empty"
 
     # Validate billed_amount is numeric and non-negative
     billed = claim.get("billed_amount")
     if not isinstance(billed, (int, float)):
-        return False, "billed_amount must be numeric"
+        return "billed_amount must be numeric"
     if billed < 0:
-        return False, "billed_amount cannot be negative"
+        return "billed_amount cannot be negative"
 
     # Validate service_date format if provided
-    if "service_date" in claim and claim["service_date"]:
-        try:
-            datetime.fromisoformat(claim["service_date"].replace('Z', '+00:00'))
-        except (ValueError, AttributeError):
-            return False, f"Invalid service_date format: {claim['service_date']}"
+    service_date = claim.get("service_date")
+    if strict_dates and service_date:
+        cacheable = date_cache is not None and isinstance(service_date, str)
+        ok = date_cache.get(service_date) if cacheable else None
+        if ok is None:
+            try:
+                datetime.fromisoformat(service_date.replace('Z', '+00:00'))
+                ok = True
+            except (ValueError, AttributeError):
+                ok = False
+            if cacheable:
+                date_cache[service_date] = ok
+        if not ok:
+            return f"Invalid service_date format: {service_date}"
+
+    return None
+
+
+def validate_claim(claim: Dict[str, Any]) -> Tuple[bool, str]:
+    """
+    Check required fields and format of a claim.
 
+    Args:
+        claim: Claim dictionary to validate
+
+    Returns:
+        Tuple of (valid: bool, reason: str)
+    """
+    reason = _claim_reason(claim)
+    if reason is not None:
+        return False, reason
     return True, "valid"
 
 
-def ingest_claim(claim: Dict[str, Any], tenant_id: str = TENANT_ID) -> Dict[str, Any]:
+def batch_validate(
+    claims: List[Dict[str, Any]],
+    strict_dates: bool = True
+) -> Tuple[List[bool], List[Dict[str, Any]]]:
+    """
+    Validate many claims, parsing each distinct service_date once.
+
+    Applies the same checks, in the same order, as validate_claim.
+
+    Args:
+        claims: List of claim dictionaries
+        strict_dates: Check service_date format (False skips date parsing)
+
+    Returns:
+        Tuple of (valid flag per claim, error dicts with index and reason)
+    """
+    valid_mask = [False] * len(claims)
+    errors = []
+    date_ok: Dict[str, bool] = {}
+
+    for i, claim in enumerate(claims):
+        reason = _claim_reason(claim, date_ok, strict_dates)
+        if reason is None:
+            valid_mask[i] = True
+        else:
+            errors.append({"index": i, "reason": reason})
+
+    return valid_mask, errors
+
+
+def _claim_receipt_data(claim: Dict[str, Any], claim_hash: Optional[str]) -> Dict[str, Any]:
+    """medicaid_ingest payload for a validated claim."""
+    return {
+        "claim_hash": claim_hash,
+        "claim_id": claim.get("claim_id"),
+        "provider_id": claim.get("provider_id"),
+        "provider_name": claim.get("provider_name"),
+        # AIHP flag: any tribal affiliation
+        "aihp_flag": bool(claim.get("patient_tribal_affiliation")),
+        "billed_amount": claim.get("billed_amount"),
+        "paid_amount": claim.get("paid_amount"),
+        "service_type": claim.get("service_type"),
+        "facility_type": claim.get("facility_type")
+    }
+
+
+def ingest_claim(
+    claim: Dict[str, Any],
+    tenant_id: str = TENANT_ID,
+    fast_mode: bool = False
+) -> Dict[str, Any]:
     """
     Validate claim structure and emit ingest_receipt.
 
     Args:
         claim: Claim dictionary
         tenant_id: Tenant identifier
+        fast_mode: Skip hashing and ledger emission and return the unsigned
+            receipt fields only (simulation harness use)
 
     Returns:
-        Receipt dict with claim_hash
+        Receipt dict with claim_hash (claim_hash is None in fast_mode)
 
     Raises:
         ValueError: If claim is invalid
@@ -88,23 +191,13 @@ def ingest_claim(claim: Dict[str, Any], tenant_id: str = TENANT_ID) -> Dict[str,
         raise ValueError(f"Invalid claim: {reason}")
 
     # Compute claim hash
-    claim_hash = dual_hash(str(claim))
-
-    # Determine AIHP flag
-    aihp_flag = bool(claim.get("patient_tribal_affiliation"))
+    claim_hash = None if fast_mode else dual_hash(_canonical_claim_bytes(claim))
 
     # Build receipt data
-    receipt_data = {
-        "claim_hash": claim_hash,
-        "claim_id": claim.get("claim_id"),
-        "provider_id": claim.get("provider_id"),
-        "provider_name": claim.get("provider_name"),
-        "aihp_flag": aihp_flag,
-        "billed_amount": claim.get("billed_amount"),
-        "paid_amount": claim.get("paid_amount"),
-        "service_type": claim.get("service_type"),
-        "facility_type": claim.get("facility_type")
-    }
+    receipt_data = _claim_receipt_data(claim, claim_hash)
+
+    if fast_mode:
+        return {"receipt_type": "medicaid_ingest", "tenant_id": tenant_id, **receipt_data}
 
     # Emit receipt
     receipt = emit_receipt("medicaid_ingest", receipt_data, tenant_id)
@@ -130,18 +223,28 @@ def batch_ingest(claims: List[Dict[str, Any]], tenant_id: str = TENANT_ID) -> Di
             "claims": []
         }, tenant_id)
 
-    # Process each claim
-    receipts = []
-    claim_hashes = []
-    errors = []
+    # Validate everything first, then hash only the valid subset
+    valid_mask, invalid = batch_validate(claims)
+    errors = [
+        {"index": e["index"], "error": f"Invalid claim: {e['reason']}"}
+        for e in invalid
+    ]
 
-    for i, claim in enumerate(claims):
-        try:
-            receipt = ingest_claim(claim, tenant_id)
-            receipts.append(receipt)
-            claim_hashes.append(receipt["claim_hash"])
-        except ValueError as e:
-            errors.append({"index": i, "error": str(e)})
+    # One scratch buffer for every canonical encoding; receipts are built
+    # afterwards in bulk
+    claim_hashes = []
+    payloads = []
+    scratch = bytearray()
+
+    for claim, valid in zip(claims, valid_mask):
+        if not valid:
+            continue
+        claim_hash = dual_hash(_canonical_claim_bytes(claim, scratch))
+        claim_hashes.append(claim_hash)
+        payloads.append(_claim_receipt_data(claim, claim_hash))
+
+    # Per-claim receipts, appended to the ledger in one write
+    receipts = emit_receipts_batch("medicaid_ingest", payloads, tenant_id)
 
     # Compute merkle root
     merkle_root = merkle(claim_hashes) if claim_hashes else merkle([])
@@ -4,19 +4,67 @@ Provider Network Graph Analysis Module
 Build and analyze provider network graph for fraud ring detection.
 """
 
+import heapq
 import math
-from collections import defaultdict
-from typing import Any, Dict, List, Optional, Set
+from array import array
+from collections import Counter, defaultdict
+from collections.abc import Sequence as SequenceABC
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
 from ..core import emit_receipt, TENANT_ID, NETWORK_ENTROPY_BASELINE
 
 
-def build_provider_graph(receipts: List[Dict]) -> Dict[str, Any]:
+class _EdgeColumns(SequenceABC):
+    """
+    Read-only edge list backed by parallel index/weight columns.
+
+    Each edge dict is built on access, so a graph that is only analyzed
+    never materializes them. The analysis functions in this module read
+    the columns directly.
+    """
+
+    def __init__(self, node_ids: List[str], src: Sequence[int], dst: Sequence[int], weight: Sequence[Any]):
+        self.node_ids = node_ids
+        self.src = src
+        self.dst = dst
+        self.weight = weight
+
+    def _edge(self, s_idx: int, d_idx: int, weight: Any) -> Dict:
+        return {
+            "source": self.node_ids[s_idx],
+            "target": self.node_ids[d_idx],
+            "weight": weight,
+            "type": "shared_patient"
+        }
+
+    def __len__(self) -> int:
+        return len(self.weight)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return self._edge(self.src[i], self.dst[i], self.weight[i])
+
+    def __iter__(self):
+        for s_idx, d_idx, weight in zip(self.src, self.dst, self.weight):
+            yield self._edge(s_idx, d_idx, weight)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, SequenceABC) and not isinstance(other, str):
+            return list(self) == list(other)
+        return NotImplemented
+
+
+def build_provider_graph(receipts: List[Dict], materialize_edges: bool = True) -> Dict[str, Any]:
     """
     Construct graph: providers as nodes, shared patients/referrals as edges.
 
     Args:
         receipts: List of medicaid_ingest receipts
+        materialize_edges: Build "edges" as a plain list of dicts. With
+            False it is a read-only view over index/weight columns that
+            builds each dict on access; callers that only run the
+            analysis functions can pass False.
 
     Returns:
         Graph dict with nodes and edges
@@ -26,7 +74,6 @@ def build_provider_graph(receipts: List[Dict]) -> Dict[str, Any]:
 
     # Build patient -> provider mapping
     patient_providers: Dict[str, Set[str]] = defaultdict(set)
-    providers: Set[str] = set()
     provider_data: Dict[str, Dict] = {}
 
     for claim in claims:
@@ -34,19 +81,22 @@ def build_provider_graph(receipts: List[Dict]) -> Dict[str, Any]:
         patient_id = claim.get("patient_id")
 
         if provider_id:
-            providers.add(provider_id)
-            provider_data[provider_id] = {
-                "provider_id": provider_id,
-                "provider_name": claim.get("provider_name"),
-                "claim_count": provider_data.get(provider_id, {}).get("claim_count", 0) + 1,
-                "total_billed": provider_data.get(provider_id, {}).get("total_billed", 0) + (claim.get("billed_amount") or 0)
-            }
+            node = provider_data.get(provider_id)
+            if node is None:
+                node = provider_data[provider_id] = {
+                    "provider_id": provider_id,
+                    "provider_name": None,
+                    "claim_count": 0,
+                    "total_billed": 0
+                }
+            node["provider_name"] = claim.get("provider_name")
+            node["claim_count"] += 1
+            node["total_billed"] += claim.get("billed_amount") or 0
 
         if patient_id and provider_id:
             patient_providers[patient_id].add(provider_id)
 
     # Build edges: providers connected by shared patients
-    edges: List[Dict] = []
     edge_weights: Dict[tuple, int] = defaultdict(int)
 
     for patient_id, provider_set in patient_providers.items():
@@ -56,25 +106,63 @@ def build_provider_graph(receipts: List[Dict]) -> Dict[str, Any]:
                 edge_key = tuple(sorted([provider_list[i], provider_list[j]]))
                 edge_weights[edge_key] += 1
 
-    for (p1, p2), weight in edge_weights.items():
-        edges.append({
-            "source": p1,
-            "target": p2,
-            "weight": weight,
-            "type": "shared_patient"
-        })
+    # Edge columns indexed by node position
+    node_ids = list(provider_data)
+    node_index = {provider_id: i for i, provider_id in enumerate(node_ids)}
+    edge_src = array("l", [node_index[p1] for p1, _ in edge_weights])
+    edge_dst = array("l", [node_index[p2] for _, p2 in edge_weights])
+    edge_weight = array("l", edge_weights.values())
+
+    edges: Sequence[Dict] = _EdgeColumns(node_ids, edge_src, edge_dst, edge_weight)
+    if materialize_edges:
+        edges = list(edges)
 
     # Build nodes list
-    nodes = [provider_data.get(p, {"provider_id": p}) for p in providers]
+    nodes = list(provider_data.values())
 
     return {
         "nodes": nodes,
         "edges": edges,
-        "n_providers": len(providers),
+        "n_providers": len(nodes),
         "n_edges": len(edges)
     }
 
 
+def _edge_arrays(graph: Dict) -> Tuple[List[str], Sequence[int], Sequence[int], Sequence[Any]]:
+    """
+    Edge columns (node_ids, src, dst, weight) for a graph.
+
+    "edges" is the source of truth: a column-backed view from
+    build_provider_graph is read directly, and any other edge list
+    (materialized, hand-built or edited) is converted on the fly.
+    """
+    edges = graph.get("edges", [])
+    if isinstance(edges, _EdgeColumns):
+        return edges.node_ids, edges.src, edges.dst, edges.weight
+
+    node_index: Dict[str, int] = {}
+    src: List[int] = []
+    dst: List[int] = []
+    weight: List[Any] = []
+
+    for edge in edges:
+        src.append(node_index.setdefault(edge["source"], len(node_index)))
+        dst.append(node_index.setdefault(edge["target"], len(node_index)))
+        weight.append(edge.get("weight", 1))
+
+    return list(node_index), src, dst, weight
+
+
+def _degrees(n_nodes: int, src: Sequence[int], dst: Sequence[int]) -> List[int]:
+    """Per-node degree counts from edge columns."""
+    degrees = [0] * n_nodes
+    for i in src:
+        degrees[i] += 1
+    for i in dst:
+        degrees[i] += 1
+    return degrees
+
+
 def detect_clusters(graph: Dict, min_size: int = 3) -> List[Dict]:
     """
     Find connected components >= min_size. Flag unusual clustering.
@@ -87,56 +175,83 @@ def detect_clusters(graph: Dict, min_size: int = 3) -> List[Dict]:
         List of cluster dicts
     """
     nodes = graph.get("nodes", [])
-    edges = graph.get("edges", [])
 
     if not nodes:
         return []
 
-    # Build adjacency list
-    adjacency: Dict[str, Set[str]] = defaultdict(set)
-    for edge in edges:
-        adjacency[edge["source"]].add(edge["target"])
-        adjacency[edge["target"]].add(edge["source"])
+    node_ids, src, dst, weight = _edge_arrays(graph)
+    node_index = {provider_id: i for i, provider_id in enumerate(node_ids)}
+
+    # Build adjacency list over node indices
+    adjacency: List[List[int]] = [[] for _ in node_ids]
+    for s_idx, d_idx in zip(src, dst):
+        adjacency[s_idx].append(d_idx)
+        adjacency[d_idx].append(s_idx)
+
+    # Once fewer unvisited nodes remain than min_size, no later
+    # component can qualify and the search stops early
+    n_total = len(set(node_ids).union(node.get("provider_id") or node for node in nodes))
 
     # Find connected components using BFS
     visited: Set[str] = set()
-    clusters = []
+    components: List[List[str]] = []
+    component_of = [-1] * len(node_ids)
 
     for node in nodes:
+        if n_total - len(visited) < min_size:
+            break
+
         node_id = node.get("provider_id") or node
         if node_id in visited:
             continue
 
-        # BFS to find component
-        component = []
-        queue = [node_id]
+        node_idx = node_index.get(node_id)
+        if min_size > 1 and (node_idx is None or not adjacency[node_idx]):
+            # Isolated node: a component of one
+            continue
+
+        # BFS to find component (queue doubles as the component list)
+        component = [node_id]
         visited.add(node_id)
 
-        while queue:
-            current = queue.pop(0)
-            component.append(current)
+        for current in component:
+            current_idx = node_index.get(current)
+            if current_idx is None:
+                continue
 
-            for neighbor in adjacency.get(current, []):
+            for neighbor_idx in adjacency[current_idx]:
+                neighbor = node_ids[neighbor_idx]
                 if neighbor not in visited:
                     visited.add(neighbor)
-                    queue.append(neighbor)
+                    component.append(neighbor)
 
         if len(component) >= min_size:
-            # Calculate cluster metrics
-            cluster_edges = [
-                e for e in edges
-                if e["source"] in component and e["target"] in component
-            ]
-            total_weight = sum(e.get("weight", 1) for e in cluster_edges)
-
-            clusters.append({
-                "cluster_id": f"cluster_{len(clusters) + 1}",
-                "providers": component,
-                "size": len(component),
-                "edge_count": len(cluster_edges),
-                "total_weight": total_weight,
-                "density": len(cluster_edges) / max(1, len(component) * (len(component) - 1) / 2)
-            })
+            for member in component:
+                member_idx = node_index.get(member)
+                if member_idx is not None:
+                    component_of[member_idx] = len(components)
+            components.append(component)
+
+    # Per-cluster edge count and weight in a single pass over edges
+    edge_count = [0] * len(components)
+    total_weight = [0] * len(components)
+    for s_idx, d_idx, w in zip(src, dst, weight):
+        c = component_of[s_idx]
+        if c >= 0 and c == component_of[d_idx]:
+            edge_count[c] += 1
+            total_weight[c] += w
+
+    clusters = []
+    for c, component in enumerate(components):
+        # Calculate cluster metrics
+        clusters.append({
+            "cluster_id": f"cluster_{c + 1}",
+            "providers": component,
+            "size": len(component),
+            "edge_count": edge_count[c],
+            "total_weight": total_weight[c],
+            "density": edge_count[c] / max(1, len(component) * (len(component) - 1) / 2)
+        })
 
     return clusters
 
@@ -151,18 +266,13 @@ def compute_network_entropy(graph: Dict) -> float:
     Returns:
         Entropy value (bits)
     """
-    edges = graph.get("edges", [])
+    node_ids, src, dst, _ = _edge_arrays(graph)
 
-    if not edges:
+    if not src:
         return 0.0
 
     # Compute degree distribution
-    degree_count: Dict[str, int] = defaultdict(int)
-    for edge in edges:
-        degree_count[edge["source"]] += 1
-        degree_count[edge["target"]] += 1
-
-    degrees = list(degree_count.values())
+    degrees = [d for d in _degrees(len(node_ids), src, dst) if d > 0]
     if not degrees:
         return 0.0
 
@@ -170,38 +280,45 @@ def compute_network_entropy(graph: Dict) -> float:
     if total == 0:
         return 0.0
 
-    # Shannon entropy
+    # Shannon entropy; degrees repeat heavily, so each distinct degree's
+    # term is computed once and weighted by how many nodes share it
     entropy = 0.0
-    for d in degrees:
-        if d > 0:
-            p = d / total
-            entropy -= p * math.log2(p)
+    for d, n_nodes in Counter(degrees).items():
+        p = d / total
+        entropy -= n_nodes * p * math.log2(p)
 
     return entropy
 
 
-def flag_hub_providers(graph: Dict, threshold: float = 2.0) -> List[Dict]:
+def flag_hub_providers(
+    graph: Dict,
+    threshold: float = 2.0,
+    top_k: Optional[int] = None
+) -> List[Dict]:
     """
     Providers with degree > threshold * mean. Return flagged list.
 
     Args:
         graph: Graph dict
         threshold: Multiplier for mean degree
+        top_k: Only return the top_k highest-degree hubs (selected without
+            sorting the whole flagged list)
 
     Returns:
-        List of flagged provider dicts
+        List of flagged provider dicts, highest degree first
     """
-    edges = graph.get("edges", [])
     nodes = graph.get("nodes", [])
+    node_ids, src, dst, _ = _edge_arrays(graph)
 
-    if not edges or not nodes:
+    if not src or not nodes:
         return []
 
     # Compute degrees
-    degree_count: Dict[str, int] = defaultdict(int)
-    for edge in edges:
-        degree_count[edge["source"]] += 1
-        degree_count[edge["target"]] += 1
+    degree_count = {
+        provider_id: degree
+        for provider_id, degree in zip(node_ids, _degrees(len(node_ids), src, dst))
+        if degree > 0
+    }
 
     if not degree_count:
         return []
@@ -224,6 +341,9 @@ def flag_hub_providers(graph: Dict, threshold: float = 2.0) -> List[Dict]:
                 "deviation": degree / mean_degree if mean_degree > 0 else 0
             })
 
+    if top_k is not None:
+        return heapq.nlargest(top_k, flagged, key=lambda x: x["degree"])
+
     return sorted(flagged, key=lambda x: x["degree"], reverse=True)
 
 
@@ -239,47 +359,41 @@ def trace_referral_chains(graph: Dict, provider_id: str, depth: int = 3) -> Dict
     Returns:
         Dict with chain structure and metrics
     """
-    edges = graph.get("edges", [])
+    node_ids, src, dst, weight = _edge_arrays(graph)
 
-    # Build adjacency list
-    adjacency: Dict[str, List[Dict]] = defaultdict(list)
-    for edge in edges:
-        adjacency[edge["source"]].append({
-            "target": edge["target"],
-            "weight": edge.get("weight", 1)
-        })
-        adjacency[edge["target"]].append({
-            "target": edge["source"],
-            "weight": edge.get("weight", 1)
-        })
+    # Build adjacency list as (neighbor, weight) pairs
+    adjacency: Dict[str, List[Tuple[str, Any]]] = defaultdict(list)
+    for s_idx, d_idx, w in zip(src, dst, weight):
+        source = node_ids[s_idx]
+        target = node_ids[d_idx]
+        adjacency[source].append((target, w))
+        adjacency[target].append((source, w))
 
-    # BFS with depth tracking
+    # BFS with depth tracking, one frontier per layer
     visited: Set[str] = {provider_id}
     layers: List[List[str]] = [[provider_id]]
-    all_edges = []
+    hops: List[Tuple[str, str, int, Any]] = []
 
-    for d in range(depth):
-        current_layer = layers[-1]
+    for d in range(1, depth + 1):
         next_layer = []
 
-        for node in current_layer:
-            for neighbor_info in adjacency.get(node, []):
-                neighbor = neighbor_info["target"]
+        for node in layers[-1]:
+            for neighbor, weight in adjacency.get(node, ()):
                 if neighbor not in visited:
                     visited.add(neighbor)
                     next_layer.append(neighbor)
-                    all_edges.append({
-                        "from": node,
-                        "to": neighbor,
-                        "depth": d + 1,
-                        "weight": neighbor_info["weight"]
-                    })
+                    hops.append((node, neighbor, d, weight))
 
         if next_layer:
             layers.append(next_layer)
         else:
             break
 
+    all_edges = [
+        {"from": src, "to": dst, "depth": d, "weight": weight}
+        for src, dst, d, weight in hops
+    ]
+
     return {
         "origin": provider_id,
         "depth_reached": len(layers) - 1,
@@ -300,10 +414,10 @@ def analyze_network(receipts: List[Dict], tenant_id: str = TENANT_ID) -> Dict:
     Returns:
         Network analysis receipt
     """
-    graph = build_provider_graph(receipts)
+    graph = build_provider_graph(receipts, materialize_edges=False)
     clusters = detect_clusters(graph, min_size=3)
     entropy = compute_network_entropy(graph)
-    hubs = flag_hub_providers(graph, threshold=2.0)
+    hubs = flag_hub_providers(graph, threshold=2.0, top_k=10)
 
     receipt_data = {
         "n_providers": graph.get("n_providers", 0),
@@ -312,7 +426,7 @@ def analyze_network(receipts: List[Dict], tenant_id: str = TENANT_ID) -> Dict:
         "network_entropy": entropy,
         "entropy_baseline": NETWORK_ENTROPY_BASELINE,
         "entropy_anomaly": entropy < NETWORK_ENTROPY_BASELINE - 0.5,
-        "flagged_hubs": [h["provider_id"] for h in hubs[:10]],
+        "flagged_hubs": [h["provider_id"] for h in hubs],
         "largest_cluster_size": max([c["size"] for c in clusters], default=0)
     }
 
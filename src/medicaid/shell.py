@@ -4,13 +4,16 @@ Shell LLC Detection Module
 Detects shell LLC proliferation pattern (Ali case: 41+ clinics from single operator).
 """
 
+import bisect
 import uuid
 from collections import defaultdict
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import combinations
 from typing import Any, Dict, List, Optional, Set
 
 from ..core import (
-    emit_receipt,
+    emit_receipts_batch,
     TENANT_ID,
     SHELL_MIN_CLUSTER,
     SHELL_BILLING_THRESHOLD,
@@ -21,6 +24,17 @@ from ..core import (
 # Shell detection constants
 SHELL_REGISTRATION_WINDOW = 365  # 1 year
 
+# Provider fields that may carry principal (agent/officer/owner) info
+PRINCIPAL_FIELDS = (
+    "registered_agent",
+    "officers",
+    "owners",
+    "principals",
+    "directors",
+    "members",
+    "managers"
+)
+
 
 def extract_principals(provider_data: Dict) -> List[str]:
     """
@@ -35,17 +49,7 @@ def extract_principals(provider_data: Dict) -> List[str]:
     principals = []
 
     # Check various fields that might contain principal info
-    principal_fields = [
-        "registered_agent",
-        "officers",
-        "owners",
-        "principals",
-        "directors",
-        "members",
-        "managers"
-    ]
-
-    for field in principal_fields:
+    for field in PRINCIPAL_FIELDS:
         value = provider_data.get(field)
         if value:
             if isinstance(value, list):
@@ -64,16 +68,18 @@ def extract_principals(provider_data: Dict) -> List[str]:
         # Track provider name as potential identifier
         principals.append(f"name:{provider_name}")
 
-    # Normalize and deduplicate
-    normalized = []
-    seen = set()
+    # Normalize and deduplicate (first spelling wins, order preserved)
+    normalized: Dict[str, str] = {}
     for p in principals:
-        p_lower = p.lower().strip()
-        if p_lower and p_lower not in seen:
-            seen.add(p_lower)
-            normalized.append(p)
+        normalized.setdefault(p.lower().strip(), p)
+    normalized.pop("", None)
+
+    return list(normalized.values())
 
-    return normalized
+
+def _principal_keys(provider_data: Dict) -> Set[str]:
+    """Lowercased principal set used for overlap tests."""
+    return {p.lower() for p in extract_principals(provider_data)}
 
 
 def build_ownership_graph(providers: List[Dict]) -> Dict[str, Any]:
@@ -114,26 +120,24 @@ def build_ownership_graph(providers: List[Dict]) -> Dict[str, Any]:
         for principal in principals:
             principal_providers[principal.lower()].add(provider_id)
 
-    # Create edges for shared principals
-    edge_weights: Dict[tuple, Dict] = {}
+    # Collect shared principals per provider pair; sorting each provider
+    # set once makes every combination an already-ordered edge key
+    pair_principals: Dict[tuple, List[str]] = defaultdict(list)
 
     for principal, provider_set in principal_providers.items():
         if len(provider_set) > 1:
-            provider_list = list(provider_set)
-            for i in range(len(provider_list)):
-                for j in range(i + 1, len(provider_list)):
-                    edge_key = tuple(sorted([provider_list[i], provider_list[j]]))
-                    if edge_key not in edge_weights:
-                        edge_weights[edge_key] = {
-                            "source": edge_key[0],
-                            "target": edge_key[1],
-                            "shared_principals": [],
-                            "weight": 0
-                        }
-                    edge_weights[edge_key]["shared_principals"].append(principal)
-                    edge_weights[edge_key]["weight"] += 1
-
-    edges = list(edge_weights.values())
+            for edge_key in combinations(sorted(provider_set), 2):
+                pair_principals[edge_key].append(principal)
+
+    edges = [
+        {
+            "source": source,
+            "target": target,
+            "shared_principals": shared,
+            "weight": len(shared)
+        }
+        for (source, target), shared in pair_principals.items()
+    ]
 
     return {
         "nodes": nodes,
@@ -163,69 +167,127 @@ def detect_shell_clusters(graph: Dict, min_shared: int = 2) -> List[Dict]:
     # Filter edges by minimum shared principals
     strong_edges = [e for e in edges if e.get("weight", 0) >= min_shared]
 
-    # Build adjacency list from strong edges
-    adjacency: Dict[str, Set[str]] = defaultdict(set)
-    for edge in strong_edges:
-        adjacency[edge["source"]].add(edge["target"])
-        adjacency[edge["target"]].add(edge["source"])
-
-    # Find connected components
-    visited: Set[str] = set()
-    clusters = []
-
     node_ids = [n.get("provider_id") for n in nodes if n.get("provider_id")]
+    node_lookup = {n.get("provider_id"): n for n in nodes}
 
+    # Union-find over integer indices (nodes first, in order, then any
+    # edge endpoint missing from nodes), with path halving and union by size
+    index: Dict[str, int] = {}
     for node_id in node_ids:
-        if node_id in visited:
-            continue
-        if node_id not in adjacency:
-            continue
+        index.setdefault(node_id, len(index))
+    n_nodes = len(index)
+    pairs = [
+        (index.setdefault(edge["source"], len(index)), index.setdefault(edge["target"], len(index)))
+        for edge in strong_edges
+    ]
 
-        # BFS
-        component = []
-        queue = [node_id]
-        visited.add(node_id)
-
-        while queue:
-            current = queue.pop(0)
-            component.append(current)
-
-            for neighbor in adjacency.get(current, []):
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append(neighbor)
-
-        if len(component) >= SHELL_MIN_CLUSTER:
-            # Find shared principals across cluster
-            all_principals: Dict[str, int] = defaultdict(int)
-            node_lookup = {n.get("provider_id"): n for n in nodes}
-
-            total_billed = 0
-            for provider_id in component:
-                node_data = node_lookup.get(provider_id, {})
-                total_billed += node_data.get("total_billed", 0)
-                for p in node_data.get("principals", []):
-                    all_principals[p.lower()] += 1
-
-            # Find principals appearing in majority of cluster
-            shared = [p for p, count in all_principals.items() if count >= len(component) * 0.5]
-
-            clusters.append({
-                "cluster_id": str(uuid.uuid4()),
-                "providers": component,
-                "n_entities": len(component),
-                "shared_principals": shared[:10],  # Top 10
-                "combined_billing": total_billed,
-                "exceeds_threshold": total_billed >= SHELL_BILLING_THRESHOLD
-            })
+    parent = list(range(len(index)))
+    size = [1] * len(index)
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in pairs:
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            if size[ra] < size[rb]:
+                ra, rb = rb, ra
+            parent[rb] = ra
+            size[ra] += size[rb]
+
+    # Members grouped by root in index order, so components come in order
+    # of their first node; components with no node at all are skipped
+    components: Dict[int, List[str]] = {}
+    for i, provider_id in enumerate(index):
+        root = find(i)
+        if size[root] >= SHELL_MIN_CLUSTER and (i < n_nodes or root in components):
+            components.setdefault(root, []).append(provider_id)
+
+    clusters = []
+
+    for component in components.values():
+        # Find shared principals across cluster
+        all_principals: Dict[str, int] = defaultdict(int)
+
+        total_billed = 0
+        for provider_id in component:
+            node_data = node_lookup.get(provider_id, {})
+            total_billed += node_data.get("total_billed", 0)
+            for p in node_data.get("principals", []):
+                all_principals[p.lower()] += 1
+
+        # Find principals appearing in majority of cluster
+        shared = [p for p, count in all_principals.items() if count >= len(component) * 0.5]
+
+        clusters.append({
+            "cluster_id": str(uuid.uuid4()),
+            "providers": component,
+            "n_entities": len(component),
+            "shared_principals": shared[:10],  # Top 10
+            "combined_billing": total_billed,
+            "exceeds_threshold": total_billed >= SHELL_BILLING_THRESHOLD
+        })
 
     return sorted(clusters, key=lambda c: c["combined_billing"], reverse=True)
 
 
+@lru_cache(maxsize=65536)
+def _parse_iso(value: str) -> Optional[datetime]:
+    """Parse an ISO timestamp, returning None when unparseable (cached)."""
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def _parse_registration_date(value: Any) -> Optional[datetime]:
+    """Parse an ISO registration date, returning None when unparseable."""
+    if not value or not isinstance(value, str):
+        return None
+    return _parse_iso(value)
+
+
+def _build_registration_index(providers: List[Dict]) -> Dict[str, Any]:
+    """
+    Sort providers by registration date once for windowed burst lookups.
+
+    Args:
+        providers: All provider data
+
+    Returns:
+        Index dict with parallel sorted "dates"/"provider_ids"/"principals"
+        lists and a provider_id lookup
+    """
+    by_id: Dict[str, Dict] = {}
+    dated = []
+
+    for provider in providers:
+        provider_id = provider.get("provider_id")
+        if provider_id not in by_id:
+            by_id[provider_id] = provider
+
+        reg_dt = _parse_registration_date(provider.get("registration_date"))
+        if reg_dt is not None:
+            dated.append((reg_dt, provider))
+
+    dated.sort(key=lambda pair: pair[0])
+
+    return {
+        "dates": [dt for dt, _ in dated],
+        "provider_ids": [p.get("provider_id") for _, p in dated],
+        "principals": [frozenset(_principal_keys(p)) for _, p in dated],
+        "by_id": by_id
+    }
+
+
 def compute_registration_burst(
     provider_id: str,
     providers: List[Dict],
-    window_days: int = SHELL_REGISTRATION_WINDOW
+    window_days: int = SHELL_REGISTRATION_WINDOW,
+    index: Optional[Dict[str, Any]] = None
 ) -> int:
     """
     Count new LLCs registered by same principal in window.
@@ -234,54 +296,58 @@ def compute_registration_burst(
         provider_id: Starting provider
         providers: All provider data
         window_days: Time window in days
+        index: Prebuilt _build_registration_index(providers), reused across
+            calls so only the providers inside the window are examined.
+            Without one, providers is scanned once.
 
     Returns:
         Count of LLCs registered in window by same principals
     """
     # Find principals for target provider
-    target_provider = None
-    for p in providers:
-        if p.get("provider_id") == provider_id:
-            target_provider = p
-            break
+    if index is not None:
+        target_provider = index["by_id"].get(provider_id)
+    else:
+        target_provider = next((p for p in providers if p.get("provider_id") == provider_id), None)
 
     if not target_provider:
         return 0
 
-    target_principals = set(p.lower() for p in extract_principals(target_provider))
+    target_principals = _principal_keys(target_provider)
     target_date = target_provider.get("registration_date")
 
     if not target_date or not target_principals:
         return 0
 
-    try:
-        target_dt = datetime.fromisoformat(target_date.replace('Z', '+00:00'))
-    except (ValueError, AttributeError):
+    target_dt = _parse_registration_date(target_date)
+    if target_dt is None:
         return 0
 
     # Find other LLCs by same principals within window
     window_start = target_dt - timedelta(days=window_days // 2)
     window_end = target_dt + timedelta(days=window_days // 2)
 
-    burst_count = 0
-
-    for provider in providers:
-        if provider.get("provider_id") == provider_id:
-            continue
-
-        reg_date = provider.get("registration_date")
-        if not reg_date:
-            continue
+    if index is None:
+        # One-off call: a linear scan beats sorting every provider
+        burst_count = 0
+        for provider in providers:
+            if provider.get("provider_id") == provider_id:
+                continue
+            reg_dt = _parse_registration_date(provider.get("registration_date"))
+            if reg_dt is not None and window_start <= reg_dt <= window_end:
+                if not target_principals.isdisjoint(_principal_keys(provider)):
+                    burst_count += 1
+        return burst_count
+
+    dates = index["dates"]
+    lo = bisect.bisect_left(dates, window_start)
+    hi = bisect.bisect_right(dates, window_end)
 
-        try:
-            reg_dt = datetime.fromisoformat(reg_date.replace('Z', '+00:00'))
-        except (ValueError, AttributeError):
-            continue
+    burst_count = 0
 
-        if window_start <= reg_dt <= window_end:
-            provider_principals = set(p.lower() for p in extract_principals(provider))
-            if target_principals & provider_principals:
-                burst_count += 1
+    candidates = zip(index["provider_ids"][lo:hi], index["principals"][lo:hi])
+    for candidate_id, principals in candidates:
+        if candidate_id != provider_id and not target_principals.isdisjoint(principals):
+            burst_count += 1
 
     return burst_count
 
@@ -339,33 +405,33 @@ def flag_shell_network(cluster: Dict, billing_total: Optional[float] = None) ->
     }
 
 
-def analyze_shell_networks(
-    providers: List[Dict],
-    tenant_id: str = TENANT_ID
-) -> List[Dict]:
+def _prepare_shell_receipts(providers: List[Dict]) -> List[Dict]:
     """
-    Full shell network analysis with receipt emission.
+    Build shell_detection receipt payloads without emitting them.
 
     Args:
         providers: Provider data list
-        tenant_id: Tenant identifier
 
     Returns:
-        List of shell detection receipts
+        List of receipt data dicts, one per detected cluster
     """
     graph = build_ownership_graph(providers)
     clusters = detect_shell_clusters(graph, min_shared=2)
 
-    receipts = []
+    registration_index = _build_registration_index(providers)
+
+    payloads = []
 
     for cluster in clusters:
         flagged = flag_shell_network(cluster)
 
         # Compute registration burst for first entity
         first_provider = cluster["providers"][0] if cluster["providers"] else None
-        reg_burst = compute_registration_burst(first_provider, providers) if first_provider else 0
+        reg_burst = compute_registration_burst(
+            first_provider, providers, index=registration_index
+        ) if first_provider else 0
 
-        receipt_data = {
+        payloads.append({
             "cluster_id": cluster["cluster_id"],
             "n_entities": cluster["n_entities"],
             "shared_principals": cluster["shared_principals"],
@@ -375,9 +441,24 @@ def analyze_shell_networks(
             "risk_score": flagged["risk_score"],
             "exceeds_billing_threshold": cluster["combined_billing"] >= SHELL_BILLING_THRESHOLD,
             "providers": cluster["providers"][:10]  # First 10 for brevity
-        }
+        })
+
+    return payloads
+
+
+def analyze_shell_networks(
+    providers: List[Dict],
+    tenant_id: str = TENANT_ID
+) -> List[Dict]:
+    """
+    Full shell network analysis with receipt emission.
 
-        receipt = emit_receipt("shell_detection", receipt_data, tenant_id)
-        receipts.append(receipt)
+    Args:
+        providers: Provider data list
+        tenant_id: Tenant identifier
 
-    return receipts
+    Returns:
+        List of shell detection receipts
+    """
+    payloads = _prepare_shell_receipts(providers)
+    return emit_receipts_batch("shell_detection", payloads, tenant_id)
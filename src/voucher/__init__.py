@@ -10,36 +10,61 @@ Key Arizona-Specific Patterns:
 - Split Purchases: Staying under $2K review threshold
 """
 
-from .ingest import ingest_transaction, batch_ingest, validate_transaction
+from .ingest import (
+    ingest_transaction,
+    batch_ingest,
+    batch_validate,
+    validate_transaction,
+    build_receipt_indices,
+    extract_txns_by_account,
+    extract_txns_by_merchant
+)
 from .category import (
     classify_transaction,
     load_category_rules,
     detect_category_gaming,
-    compute_educational_ratio
+    compute_educational_ratio,
+    compute_educational_ratios,
+    normalize_txns,
+    scan_categories,
+    mcc_to_int,
+    TxnView
 )
 from .merchant import (
     build_merchant_index,
     flag_new_merchant,
     detect_merchant_front,
-    compute_merchant_entropy
+    compute_merchant_entropy,
+    analyze_merchant,
+    analyze_all_merchants
 )
 from .patterns import (
     detect_threshold_gaming,
     detect_seasonal_spike,
     compute_peer_deviation,
-    flag_egregious_items
+    compute_peer_deviations_all,
+    flag_egregious_items,
+    analyze_account_patterns,
+    analyze_all_accounts,
+    AccountView
 )
 
 __all__ = [
     # ingest
-    'ingest_transaction', 'batch_ingest', 'validate_transaction',
+    'ingest_transaction', 'batch_ingest', 'batch_validate', 'validate_transaction',
+    'build_receipt_indices', 'extract_txns_by_account', 'extract_txns_by_merchant',
     # category
     'classify_transaction', 'load_category_rules',
     'detect_category_gaming', 'compute_educational_ratio',
+    'compute_educational_ratios', 'normalize_txns', 'scan_categories',
+    'mcc_to_int', 'TxnView',
     # merchant
     'build_merchant_index', 'flag_new_merchant',
     'detect_merchant_front', 'compute_merchant_entropy',
+    'analyze_merchant', 'analyze_all_merchants',
     # patterns
     'detect_threshold_gaming', 'detect_seasonal_spike',
-    'compute_peer_deviation', 'flag_egregious_items'
+    'compute_peer_deviation', 'compute_peer_deviations_all',
+    'flag_egregious_items', 'analyze_account_patterns', 'analyze_all_accounts',
+    'AccountView'
 ]
@@ -4,7 +4,11 @@ ESA Transaction Category Classification Module
 Classifies transactions as educational vs non-educational.
 """
 
-from typing import Any, Dict, List, Optional
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 from ..core import emit_receipt, TENANT_ID, ESA_EGREGIOUS_KEYWORDS
 
@@ -98,6 +102,35 @@ NON_EDUCATIONAL_MCCS = {
     "5999": "miscellaneous_retail",
 }
 
+# Membership-only views of the MCC maps (the names are only for reasons)
+EDUCATIONAL_MCC_SET = frozenset(EDUCATIONAL_MCCS)
+NON_EDUCATIONAL_MCC_SET = frozenset(NON_EDUCATIONAL_MCCS)
+
+# Non-educational membership indexed by integer MCC (see mcc_to_int)
+_NON_ED_MCC_BITS = bytearray(10_000)
+for _mcc in NON_EDUCATIONAL_MCC_SET:
+    _NON_ED_MCC_BITS[int(_mcc)] = 1
+del _mcc
+
+
+def mcc_to_int(mcc: Any) -> int:
+    """
+    Integer form of a merchant category code.
+
+    Only four ASCII digits (after stripping) convert, so equal integers
+    always mean equal code strings; anything else maps to -1.
+
+    Args:
+        mcc: Raw merchant_category_code value
+
+    Returns:
+        MCC as int (0-9999), or -1
+    """
+    code = str(mcc).strip()
+    if len(code) == 4 and code.isascii() and code.isdigit():
+        return int(code)
+    return -1
+
 # Known non-educational merchant patterns
 NON_EDUCATIONAL_MERCHANTS = [
     "snowbowl",
@@ -122,6 +155,197 @@ NON_EDUCATIONAL_MERCHANTS = [
     "dispensary",
 ]
 
+# Common educational indicators in merchant names or descriptions
+EDUCATIONAL_INDICATORS = [
+    "school", "academy", "learning", "tutor", "curriculum",
+    "education", "college", "university", "textbook", "workbook"
+]
+
+
+def _keyword_regex(keywords: List[str]) -> "re.Pattern[str]":
+    """Alternation matching any of the keywords as a substring (longest first)."""
+    return re.compile("|".join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True)))
+
+
+# Each keyword list compiled once, so a miss costs one C-level scan
+_EGREGIOUS_RE = _keyword_regex(ESA_EGREGIOUS_KEYWORDS)
+NON_ED_MERCHANT_RE = _keyword_regex(NON_EDUCATIONAL_MERCHANTS)
+_EDU_INDICATOR_RE = _keyword_regex(EDUCATIONAL_INDICATORS)
+
+# Case-insensitive twin: re folds case per character, so it hits wherever
+# the lowercased text would and raw text can be rejected before .lower()
+_EGREGIOUS_ANYCASE_RE = re.compile(_EGREGIOUS_RE.pattern, re.IGNORECASE)
+
+_CATEGORY_SCANS = (
+    ("egregious", _EGREGIOUS_RE),
+    ("non_ed_merchant", NON_ED_MERCHANT_RE),
+    ("edu_indicator", _EDU_INDICATOR_RE),
+)
+
+# Educational wording that signals category gaming at a non-educational merchant
+GAMING_LANGUAGE = ["tutor", "lesson", "education", "curriculum", "learning", "class"]
+_GAMING_LANGUAGE_RE = _keyword_regex(GAMING_LANGUAGE)
+
+# MCC -> classification result, built once; non-educational codes take priority
+_MCC_RULES: Dict[str, Tuple[str, float, Optional[bool], str]] = {
+    **{mcc: ("educational", 0.85, True, f"educational_mcc:{mcc}") for mcc in EDUCATIONAL_MCC_SET},
+    **{mcc: ("non_educational", 0.85, False, f"non_educational_mcc:{mcc}") for mcc in NON_EDUCATIONAL_MCC_SET},
+}
+
+
+def _first_keyword(keywords: List[str], regex: "re.Pattern[str]", *texts: str) -> Optional[str]:
+    """
+    First keyword (in list order) contained in any of the texts.
+
+    The compiled alternation rejects texts with no keyword in one pass;
+    only on a hit is the list walked to report the same keyword the
+    sequential scan would.
+    """
+    if not any(regex.search(text) for text in texts):
+        return None
+
+    for keyword in keywords:
+        for text in texts:
+            if keyword in text:
+                return keyword
+
+    return None
+
+
+def _field_str(txn: Dict[str, Any], key: str) -> str:
+    """str(txn.get(key, "")), skipping the str() call for string values."""
+    value = txn.get(key, "")
+    return value if type(value) is str else str(value)
+
+
+def normalize_txns(txns: List[Dict]) -> List[Dict]:
+    """
+    Copy transactions with lowercased text fields precomputed.
+
+    Call once at the top of a batch analysis; the classifiers and pattern
+    detectors then read "_name_lc" / "_desc_lc" (and the combined
+    "_search_lc" keyword scans run over) instead of lowercasing the same
+    strings at every call site. Input dicts are not modified.
+
+    Args:
+        txns: List of transactions
+
+    Returns:
+        New list of transaction dicts with "_name_lc", "_desc_lc" and
+        "_search_lc"
+    """
+    normalized = []
+    for txn in txns:
+        name_lc = _field_str(txn, "merchant_name").lower()
+        desc_lc = _field_str(txn, "description").lower()
+        normalized.append({
+            **txn,
+            "_name_lc": name_lc,
+            "_desc_lc": desc_lc,
+            "_search_lc": f"{desc_lc} {name_lc}"
+        })
+    return normalized
+
+
+@dataclass(slots=True)
+class TxnView:
+    """
+    Transaction with the fields the classifiers read normalized once.
+
+    Build views with TxnView.batch at the top of a batch analysis and pass
+    them to the voucher classifiers and pattern detectors in place of the
+    dicts; get() reads through to the original dict for any other field.
+    Functions that return transactions return the original dicts.
+    """
+    txn_id: Any
+    account_id: Any
+    merchant_id: Any
+    mcc: str
+    name_lc: str
+    desc_lc: str
+    amount: Any
+    txn: Dict[str, Any] = field(repr=False)
+
+    @classmethod
+    def from_dict(cls, txn: Dict[str, Any]) -> "TxnView":
+        """View of one transaction dict."""
+        name_lc, desc_lc = _text_fields(txn)
+        return cls(
+            txn_id=txn.get("txn_id"),
+            account_id=txn.get("account_id"),
+            merchant_id=txn.get("merchant_id"),
+            mcc=_field_str(txn, "merchant_category_code").strip(),
+            name_lc=name_lc,
+            desc_lc=desc_lc,
+            amount=txn.get("amount", 0),
+            txn=txn
+        )
+
+    @classmethod
+    def batch(cls, txns: List[Union[Dict[str, Any], "TxnView"]]) -> List["TxnView"]:
+        """Views of many transactions (existing views are passed through)."""
+        return [t if isinstance(t, cls) else cls.from_dict(t) for t in txns]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Field of the underlying transaction dict."""
+        return self.txn.get(key, default)
+
+
+def _rule_fields(txn: Union[Dict[str, Any], TxnView]) -> Tuple[str, str, str]:
+    """Normalized (mcc, merchant_name, description) for the classification rules."""
+    if isinstance(txn, TxnView):
+        return txn.mcc, txn.name_lc, txn.desc_lc
+    return (_field_str(txn, "merchant_category_code").strip(), *_text_fields(txn))
+
+
+def _text_fields(txn: Dict[str, Any]) -> Tuple[str, str]:
+    """Lowercased (merchant_name, description), precomputed if normalized."""
+    if isinstance(txn, TxnView):
+        return txn.name_lc, txn.desc_lc
+    name_lc = txn.get("_name_lc")
+    if name_lc is None:
+        return _field_str(txn, "merchant_name").lower(), _field_str(txn, "description").lower()
+    return name_lc, txn["_desc_lc"]
+
+
+def _search_text(txn: Dict[str, Any]) -> str:
+    """Lowercased "description merchant_name", precomputed if normalized."""
+    search_lc = txn.get("_search_lc")
+    if search_lc is None:
+        merchant_name, description = _text_fields(txn)
+        return f"{description} {merchant_name}"
+    return search_lc
+
+
+def _egregious_search_text(txn: Union[Dict[str, Any], TxnView]) -> Optional[str]:
+    """
+    _search_text, or None when the text cannot hold an egregious keyword.
+
+    TxnViews and normalized dicts already carry lowercased text. Raw dicts
+    are screened case-insensitively first, so the common clean
+    transaction is never lowercased.
+    """
+    if isinstance(txn, TxnView) or txn.get("_name_lc") is not None:
+        return _search_text(txn)
+
+    raw = f"{_field_str(txn, 'description')} {_field_str(txn, 'merchant_name')}"
+    if _EGREGIOUS_ANYCASE_RE.search(raw) is None:
+        return None
+    return raw.lower()
+
+
+def scan_categories(text: str) -> Set[str]:
+    """
+    Keyword categories present in lowercased text.
+
+    Args:
+        text: Lowercased merchant name and/or description
+
+    Returns:
+        Subset of {"egregious", "non_ed_merchant", "edu_indicator"}
+    """
+    return {tag for tag, regex in _CATEGORY_SCANS if regex.search(text)}
+
 
 def load_category_rules() -> Dict[str, Any]:
     """
@@ -138,72 +362,20 @@ def load_category_rules() -> Dict[str, Any]:
     }
 
 
-def classify_transaction(txn: Dict[str, Any]) -> Dict[str, Any]:
+def classify_transaction(txn: Union[Dict[str, Any], TxnView]) -> Dict[str, Any]:
     """
     Classify transaction as educational vs non-educational.
 
     Args:
-        txn: Transaction dict
+        txn: Transaction dict or TxnView
 
     Returns:
         Dict with category, confidence, and educational_flag
     """
-    mcc = str(txn.get("merchant_category_code", "")).strip()
-    merchant_name = str(txn.get("merchant_name", "")).lower()
-    description = str(txn.get("description", "")).lower()
-    amount = txn.get("amount", 0)
+    mcc, merchant_name, description = _rule_fields(txn)
+    amount = txn.amount if isinstance(txn, TxnView) else txn.get("amount", 0)
 
-    # Default values
-    category = "questionable"
-    confidence = 0.5
-    educational_flag = None
-    reason = "unable_to_classify"
-
-    # Check for egregious keywords first (highest priority)
-    for keyword in ESA_EGREGIOUS_KEYWORDS:
-        if keyword in merchant_name or keyword in description:
-            category = "non_educational"
-            confidence = 0.95
-            educational_flag = False
-            reason = f"egregious_keyword:{keyword}"
-            break
-
-    # Check non-educational merchant patterns
-    if category == "questionable":
-        for pattern in NON_EDUCATIONAL_MERCHANTS:
-            if pattern in merchant_name:
-                category = "non_educational"
-                confidence = 0.90
-                educational_flag = False
-                reason = f"non_educational_merchant:{pattern}"
-                break
-
-    # Check MCC codes
-    if category == "questionable":
-        if mcc in NON_EDUCATIONAL_MCCS:
-            category = "non_educational"
-            confidence = 0.85
-            educational_flag = False
-            reason = f"non_educational_mcc:{mcc}"
-        elif mcc in EDUCATIONAL_MCCS:
-            category = "educational"
-            confidence = 0.85
-            educational_flag = True
-            reason = f"educational_mcc:{mcc}"
-
-    # Additional checks for common educational indicators
-    if category == "questionable":
-        educational_indicators = [
-            "school", "academy", "learning", "tutor", "curriculum",
-            "education", "college", "university", "textbook", "workbook"
-        ]
-        for indicator in educational_indicators:
-            if indicator in merchant_name or indicator in description:
-                category = "educational"
-                confidence = 0.70
-                educational_flag = True
-                reason = f"educational_indicator:{indicator}"
-                break
+    category, confidence, educational_flag, reason = _classify(mcc, merchant_name, description)
 
     return {
         "txn_id": txn.get("txn_id"),
@@ -217,12 +389,51 @@ def classify_transaction(txn: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def detect_category_gaming(txns: List[Dict]) -> List[Dict]:
+@lru_cache(maxsize=65536)
+def _classify(mcc: str, merchant_name: str, description: str) -> Tuple[str, float, Optional[bool], str]:
+    """
+    Classification rules over normalized fields.
+
+    Memoized: a merchant's transactions usually share MCC, name and
+    description, so repeats skip the keyword scans entirely.
+
+    Args:
+        mcc: Stripped merchant category code
+        merchant_name: Lowercased merchant name
+        description: Lowercased description
+
+    Returns:
+        Tuple of (category, confidence, educational_flag, reason)
+    """
+    # Check for egregious keywords first (highest priority)
+    keyword = _first_keyword(ESA_EGREGIOUS_KEYWORDS, _EGREGIOUS_RE, merchant_name, description)
+    if keyword is not None:
+        return "non_educational", 0.95, False, f"egregious_keyword:{keyword}"
+
+    # Check non-educational merchant patterns
+    pattern = _first_keyword(NON_EDUCATIONAL_MERCHANTS, NON_ED_MERCHANT_RE, merchant_name)
+    if pattern is not None:
+        return "non_educational", 0.90, False, f"non_educational_merchant:{pattern}"
+
+    # Check MCC codes
+    mcc_rule = _MCC_RULES.get(mcc)
+    if mcc_rule is not None:
+        return mcc_rule
+
+    # Additional checks for common educational indicators
+    indicator = _first_keyword(EDUCATIONAL_INDICATORS, _EDU_INDICATOR_RE, merchant_name, description)
+    if indicator is not None:
+        return "educational", 0.70, True, f"educational_indicator:{indicator}"
+
+    return "questionable", 0.5, None, "unable_to_classify"
+
+
+def detect_category_gaming(txns: List[Union[Dict, TxnView]]) -> List[Dict]:
     """
     Flag attempts to miscategorize (e.g., "tutoring" at ski resort).
 
     Args:
-        txns: List of transactions
+        txns: List of transactions (dicts or TxnViews)
 
     Returns:
         List of flagged gaming attempts
@@ -230,24 +441,22 @@ def detect_category_gaming(txns: List[Dict]) -> List[Dict]:
     flagged = []
 
     for txn in txns:
-        merchant_name = str(txn.get("merchant_name", "")).lower()
-        description = str(txn.get("description", "")).lower()
-        mcc = str(txn.get("merchant_category_code", ""))
+        mcc, merchant_name, description = _rule_fields(txn)
+        mcc_int = txn.get("mcc_int")
 
         # Check for educational language with non-educational MCC
-        educational_language = any(
-            word in description for word in
-            ["tutor", "lesson", "education", "curriculum", "learning", "class"]
-        )
+        educational_language = _GAMING_LANGUAGE_RE.search(description) is not None
 
-        is_non_educational_mcc = mcc in NON_EDUCATIONAL_MCCS
-        is_non_educational_merchant = any(
-            pattern in merchant_name for pattern in NON_EDUCATIONAL_MERCHANTS
-        )
+        if mcc_int is not None:
+            # Ingested receipts carry the integer code; one bytearray load
+            is_non_educational_mcc = mcc_int >= 0 and _NON_ED_MCC_BITS[mcc_int] == 1
+        else:
+            is_non_educational_mcc = mcc in NON_EDUCATIONAL_MCC_SET
+        is_non_educational_merchant = NON_ED_MERCHANT_RE.search(merchant_name) is not None
 
         if educational_language and (is_non_educational_mcc or is_non_educational_merchant):
             flagged.append({
-                **txn,
+                **(txn.txn if isinstance(txn, TxnView) else txn),
                 "gaming_type": "educational_language_non_educational_merchant",
                 "evidence": {
                     "description_has_educational": educational_language,
@@ -259,13 +468,45 @@ def detect_category_gaming(txns: List[Dict]) -> List[Dict]:
     return flagged
 
 
-def compute_educational_ratio(account_id: str, txns: List[Dict]) -> float:
+def _txn_category(txn: Union[Dict[str, Any], TxnView]) -> str:
+    """classify_transaction's category, without building the result dict."""
+    category, _, _, _ = _classify(*_rule_fields(txn))
+    return category
+
+
+def _is_educational(txn: Union[Dict[str, Any], TxnView]) -> bool:
+    """classify_transaction's educational_flag, without building the result dict."""
+    _, _, educational_flag, _ = _classify(*_rule_fields(txn))
+    return bool(educational_flag)
+
+
+def _educational_ratio(account_txns: List[Dict]) -> float:
+    """Educational share of positive spending in one account's transactions."""
+    total_amount = 0.0
+    educational_amount = 0.0
+
+    for txn in account_txns:
+        amount = txn.amount if isinstance(txn, TxnView) else txn.get("amount", 0)
+        if amount <= 0:
+            continue
+
+        total_amount += amount
+        if _is_educational(txn):
+            educational_amount += amount
+
+    if total_amount == 0:
+        return 0.0
+
+    return educational_amount / total_amount
+
+
+def compute_educational_ratio(account_id: str, txns: List[Union[Dict, TxnView]]) -> float:
     """
     Percentage of spending on educational items.
 
     Args:
         account_id: Account to analyze
-        txns: List of all transactions
+        txns: List of all transactions (dicts or TxnViews)
 
     Returns:
         Ratio of educational spending (0.0 to 1.0)
@@ -275,27 +516,30 @@ def compute_educational_ratio(account_id: str, txns: List[Dict]) -> float:
         if t.get("account_id") == account_id
     ]
 
-    if not account_txns:
-        return 0.0
+    return _educational_ratio(account_txns)
 
-    total_amount = 0.0
-    educational_amount = 0.0
 
-    for txn in account_txns:
-        amount = txn.get("amount", 0)
-        if amount <= 0:
-            continue
+def compute_educational_ratios(txns: List[Dict]) -> Dict[str, float]:
+    """
+    Educational spending ratio for every account, grouping txns in one pass.
 
-        total_amount += amount
+    Use this instead of calling compute_educational_ratio per account, which
+    rescans the full transaction list each time.
 
-        classification = classify_transaction(txn)
-        if classification.get("educational_flag"):
-            educational_amount += amount
+    Args:
+        txns: List of all transactions
 
-    if total_amount == 0:
-        return 0.0
+    Returns:
+        Dict mapping account_id to ratio of educational spending
+    """
+    by_account: Dict[Any, List[Dict]] = defaultdict(list)
+    for txn in txns:
+        by_account[txn.get("account_id")].append(txn)
 
-    return educational_amount / total_amount
+    return {
+        account_id: _educational_ratio(account_txns)
+        for account_id, account_txns in by_account.items()
+    }
 
 
 def emit_category_receipt(txn: Dict, tenant_id: str = TENANT_ID) -> Dict:
@@ -4,10 +4,14 @@ ESA Voucher Transaction Ingestion Module
 Ingests ESA transaction data into the receipts stream.
 """
 
+import math
+from array import array
+from collections import defaultdict
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
-from ..core import emit_receipt, dual_hash, merkle, TENANT_ID
+from ..core import emit_receipt, emit_receipts_batch, dual_hash, merkle, write_canonical, TENANT_ID
+from .category import mcc_to_int
 
 
 # Required fields for a valid transaction
@@ -27,51 +31,153 @@ OPTIONAL_TXN_FIELDS = [
 ]
 
 
-def validate_transaction(txn: Dict[str, Any]) -> Tuple[bool, str]:
+def _canonical_txn_bytes(txn: Dict[str, Any], buf: Optional[bytearray] = None) -> bytearray:
     """
-    Check required fields and format of a transaction.
+    Canonical bytes of a whole transaction (every key/value, sorted by key).
+
+    Args:
+        txn: Transaction dictionary
+        buf: Optional scratch buffer, cleared and reused
+
+    Returns:
+        Buffer holding the encoding
+    """
+    if buf is None:
+        buf = bytearray()
+    else:
+        del buf[:]
+    write_canonical(buf, (txn,))
+    return buf
+
+
+def _txn_reason(
+    txn: Dict[str, Any],
+    date_cache: Optional[Dict[str, bool]] = None,
+    strict_dates: bool = True
+) -> Optional[str]:
+    """
+    First validation failure for a transaction, or None if it is valid.
 
     Args:
         txn: Transaction dictionary to validate
+        date_cache: Optional map of txn_date string to parse result, shared
+            across calls so each distinct date is parsed once
+        strict_dates: Check txn_date format (False skips date parsing)
 
     Returns:
-        Tuple of (valid: bool, reason: str)
+        Failure reason, or None
     """
     for field in REQUIRED_TXN_FIELDS:
         if field not in txn:
-            return False, f"Missing required field: {field}"
+            return f"Missing required field: {field}"
 
     # Validate txn_id is non-empty
     if not txn.get("txn_id"):
-        return False, "txn_id cannot be empty"
+        return "txn_id cannot be empty"
 
     # Validate amount is numeric and non-negative
     amount = txn.get("amount")
     if not isinstance(amount, (int, float)):
-        return False, "amount must be numeric"
+        return "amount must be numeric"
     if amount < 0:
-        return False, "amount cannot be negative"
+        return "amount cannot be negative"
 
     # Validate txn_date format if provided
-    if "txn_date" in txn and txn["txn_date"]:
-        try:
-            datetime.fromisoformat(txn["txn_date"].replace('Z', '+00:00'))
-        except (ValueError, AttributeError):
-            return False, f"Invalid txn_date format: {txn['txn_date']}"
+    txn_date = txn.get("txn_date")
+    if strict_dates and txn_date:
+        cacheable = date_cache is not None and isinstance(txn_date, str)
+        ok = date_cache.get(txn_date) if cacheable else None
+        if ok is None:
+            try:
+                datetime.fromisoformat(txn_date.replace('Z', '+00:00'))
+                ok = True
+            except (ValueError, AttributeError):
+                ok = False
+            if cacheable:
+                date_cache[txn_date] = ok
+        if not ok:
+            return f"Invalid txn_date format: {txn_date}"
+
+    return None
 
+
+def validate_transaction(txn: Dict[str, Any]) -> Tuple[bool, str]:
+    """
+    Check required fields and format of a transaction.
+
+    Args:
+        txn: Transaction dictionary to validate
+
+    Returns:
+        Tuple of (valid: bool, reason: str)
+    """
+    reason = _txn_reason(txn)
+    if reason is not None:
+        return False, reason
     return True, "valid"
 
 
-def ingest_transaction(txn: Dict[str, Any], tenant_id: str = TENANT_ID) -> Dict[str, Any]:
+def batch_validate(
+    txns: List[Dict[str, Any]],
+    strict_dates: bool = True
+) -> Tuple[List[bool], List[Dict[str, Any]]]:
+    """
+    Validate many transactions, parsing each distinct txn_date once.
+
+    Applies the same checks, in the same order, as validate_transaction.
+
+    Args:
+        txns: List of transaction dictionaries
+        strict_dates: Check txn_date format (False skips date parsing)
+
+    Returns:
+        Tuple of (valid flag per txn, error dicts with index and reason)
+    """
+    valid_mask = [False] * len(txns)
+    errors = []
+    date_ok: Dict[str, bool] = {}
+
+    for i, txn in enumerate(txns):
+        reason = _txn_reason(txn, date_ok, strict_dates)
+        if reason is None:
+            valid_mask[i] = True
+        else:
+            errors.append({"index": i, "reason": reason})
+
+    return valid_mask, errors
+
+
+def _txn_receipt_data(txn: Dict[str, Any], txn_hash: Optional[str]) -> Dict[str, Any]:
+    """voucher_ingest payload for a validated transaction."""
+    return {
+        "txn_hash": txn_hash,
+        "txn_id": txn.get("txn_id"),
+        "account_id": txn.get("account_id"),
+        "merchant_id": txn.get("merchant_id"),
+        "merchant_name": txn.get("merchant_name"),
+        "merchant_category_code": txn.get("merchant_category_code"),
+        "mcc_int": mcc_to_int(txn.get("merchant_category_code", "")),
+        "amount": txn.get("amount"),
+        "description": txn.get("description")
+    }
+
+
+def ingest_transaction(
+    txn: Dict[str, Any],
+    tenant_id: str = TENANT_ID,
+    fast_mode: bool = False
+) -> Dict[str, Any]:
     """
     Validate transaction and emit ingest_receipt.
 
     Args:
         txn: Transaction dictionary
         tenant_id: Tenant identifier
+        fast_mode: Skip hashing and ledger emission and return the unsigned
+            receipt fields only (simulation harness use)
 
     Returns:
-        Receipt dict with txn_hash
+        Receipt dict with txn_hash (txn_hash is None in fast_mode)
 
     Raises:
         ValueError: If transaction is invalid
@@ -81,19 +187,13 @@ def ingest_transaction(txn: Dict[str, Any], tenant_id: str = TENANT_ID) -> Dict[
         raise ValueError(f"Invalid transaction: {reason}")
 
     # Compute transaction hash
-    txn_hash = dual_hash(str(txn))
+    txn_hash = None if fast_mode else dual_hash(_canonical_txn_bytes(txn))
 
     # Build receipt data
-    receipt_data = {
-        "txn_hash": txn_hash,
-        "txn_id": txn.get("txn_id"),
-        "account_id": txn.get("account_id"),
-        "merchant_id": txn.get("merchant_id"),
-        "merchant_name": txn.get("merchant_name"),
-        "merchant_category_code": txn.get("merchant_category_code"),
-        "amount": txn.get("amount"),
-        "description": txn.get("description")
-    }
+    receipt_data = _txn_receipt_data(txn, txn_hash)
+
+    if fast_mode:
+        return {"receipt_type": "voucher_ingest", "tenant_id": tenant_id, **receipt_data}
 
     # Emit receipt
     receipt = emit_receipt("voucher_ingest", receipt_data, tenant_id)
@@ -119,24 +219,36 @@ def batch_ingest(txns: List[Dict[str, Any]], tenant_id: str = TENANT_ID) -> Dict
             "txns": []
         }, tenant_id)
 
-    # Process each transaction
-    receipts = []
-    txn_hashes = []
-    errors = []
+    # Validate everything first, then hash only the valid subset
+    valid_mask, invalid = batch_validate(txns)
+    valid_txns = [txn for txn, valid in zip(txns, valid_mask) if valid]
+    errors = [
+        {"index": e["index"], "error": f"Invalid transaction: {e['reason']}"}
+        for e in invalid
+    ]
 
-    for i, txn in enumerate(txns):
-        try:
-            receipt = ingest_transaction(txn, tenant_id)
-            receipts.append(receipt)
-            txn_hashes.append(receipt["txn_hash"])
-        except ValueError as e:
-            errors.append({"index": i, "error": str(e)})
+    # Hashes, payloads and amounts filled in one pass into presized
+    # columns, with one scratch buffer for every canonical encoding
+    n_valid = len(valid_txns)
+    txn_hashes: List[Optional[str]] = [None] * n_valid
+    payloads: List[Optional[Dict[str, Any]]] = [None] * n_valid
+    amounts = array("d", [0.0]) * n_valid
+    scratch = bytearray()
+
+    for i, txn in enumerate(valid_txns):
+        txn_hash = dual_hash(_canonical_txn_bytes(txn, scratch))
+        txn_hashes[i] = txn_hash
+        payloads[i] = _txn_receipt_data(txn, txn_hash)
+        amounts[i] = txn["amount"]
+
+    # Per-transaction receipts, appended to the ledger in one write
+    receipts = emit_receipts_batch("voucher_ingest", payloads, tenant_id)
 
     # Compute merkle root
     merkle_root = merkle(txn_hashes) if txn_hashes else merkle([])
 
     # Calculate totals
-    total_amount = sum(r.get("amount", 0) for r in receipts)
+    total_amount = math.fsum(amounts)
 
     # Build batch receipt
     batch_data = {
@@ -151,17 +263,51 @@ def batch_ingest(txns: List[Dict[str, Any]], tenant_id: str = TENANT_ID) -> Dict
     return emit_receipt("voucher_batch_ingest", batch_data, tenant_id)
 
 
-def extract_txns_by_account(receipts: List[Dict], account_id: str) -> List[Dict]:
+def build_receipt_indices(
+    receipts: List[Dict]
+) -> Tuple[Dict[Any, List[Dict]], Dict[Any, List[Dict]]]:
+    """
+    Index voucher_ingest receipts by account and by merchant in one pass.
+
+    Pass the result to extract_txns_by_account / extract_txns_by_merchant
+    when querying many accounts or merchants from the same receipts.
+
+    Args:
+        receipts: List of receipt dicts
+
+    Returns:
+        Tuple of (by_account, by_merchant) dicts mapping ID -> receipts
+    """
+    by_account: Dict[Any, List[Dict]] = defaultdict(list)
+    by_merchant: Dict[Any, List[Dict]] = defaultdict(list)
+
+    for r in receipts:
+        if r.get("receipt_type") == "voucher_ingest":
+            by_account[r.get("account_id")].append(r)
+            by_merchant[r.get("merchant_id")].append(r)
+
+    return by_account, by_merchant
+
+
+def extract_txns_by_account(
+    receipts: List[Dict],
+    account_id: str,
+    indices: Optional[Tuple[Dict, Dict]] = None
+) -> List[Dict]:
     """
     Extract all transactions for a specific account from receipts.
 
     Args:
         receipts: List of receipt dicts
         account_id: Account ID to filter by
+        indices: Optional result of build_receipt_indices(receipts)
 
     Returns:
         List of matching receipts
     """
+    if indices is not None:
+        return list(indices[0].get(account_id, ()))
+
     return [
         r for r in receipts
         if r.get("receipt_type") == "voucher_ingest"
@@ -169,17 +315,25 @@ def extract_txns_by_account(receipts: List[Dict], account_id: str) -> List[Dict]
     ]
 
 
-def extract_txns_by_merchant(receipts: List[Dict], merchant_id: str) -> List[Dict]:
+def extract_txns_by_merchant(
+    receipts: List[Dict],
+    merchant_id: str,
+    indices: Optional[Tuple[Dict, Dict]] = None
+) -> List[Dict]:
     """
     Extract all transactions for a specific merchant from receipts.
 
     Args:
         receipts: List of receipt dicts
         merchant_id: Merchant ID to filter by
+        indices: Optional result of build_receipt_indices(receipts)
 
     Returns:
         List of matching receipts
     """
+    if indices is not None:
+        return list(indices[1].get(merchant_id, ()))
+
     return [
         r for r in receipts
         if r.get("receipt_type") == "voucher_ingest"
@@ -7,16 +7,28 @@ Build merchant database with educational classification.
 import gzip
 import json
 import math
+import multiprocessing
+import os
+from array import array
 from collections import defaultdict
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
-from ..core import emit_receipt, TENANT_ID, get_risk_level
+from ..core import emit_receipt, emit_receipts_batch, TENANT_ID, get_risk_level
 
 
 # Merchant thresholds
 MERCHANT_REVIEW_THRESHOLD = 10_000  # New merchant + >$10K = review
 MERCHANT_FRONT_THRESHOLD = 0.7  # Front score > 0.7 = flag
 
+# Below this many merchants, worker startup costs more than it saves
+MERCHANT_PARALLEL_MIN = 32
+
+# Merchant names that present as educational
+EDUCATIONAL_NAME_KEYWORDS = (
+    "academy", "school", "learning", "education", "tutor",
+    "curriculum", "study", "college", "prep", "teach"
+)
+
 
 def build_merchant_index(txns: List[Dict]) -> Dict[str, Dict]:
     """
@@ -45,18 +57,25 @@ def build_merchant_index(txns: List[Dict]) -> Dict[str, Dict]:
                 "accounts": set(),
                 "first_seen": txn.get("ts") or txn.get("txn_date"),
                 "last_seen": txn.get("ts") or txn.get("txn_date"),
-                "amounts": []
+                "max_amount": None,
+                "min_amount": None
             }
 
         merchant = merchants[merchant_id]
         amount = txn.get("amount", 0)
 
+        # Running stats instead of keeping every amount
         merchant["total_spend"] += amount
         merchant["txn_count"] += 1
-        merchant["amounts"].append(amount)
+        if merchant["max_amount"] is None or amount > merchant["max_amount"]:
+            merchant["max_amount"] = amount
+        if merchant["min_amount"] is None or amount < merchant["min_amount"]:
+            merchant["min_amount"] = amount
 
-        if txn.get("account_id"):
-            merchant["accounts"].add(txn.get("account_id"))
+        # Track unique accounts
+        account_id = txn.get("account_id")
+        if account_id:
+            merchant["accounts"].add(account_id)
 
         # Update last_seen
         txn_date = txn.get("ts") or txn.get("txn_date")
@@ -64,17 +83,12 @@ def build_merchant_index(txns: List[Dict]) -> Dict[str, Dict]:
             if merchant["last_seen"] is None or txn_date > merchant["last_seen"]:
                 merchant["last_seen"] = txn_date
 
-    # Convert sets to counts and compute stats
+    # Convert account sets to counts and finish stats
     for merchant in merchants.values():
-        merchant["unique_accounts"] = len(merchant["accounts"])
-        del merchant["accounts"]
-
-        amounts = merchant.get("amounts", [])
-        if amounts:
-            merchant["avg_amount"] = sum(amounts) / len(amounts)
-            merchant["max_amount"] = max(amounts)
-            merchant["min_amount"] = min(amounts)
-        del merchant["amounts"]
+        merchant["unique_accounts"] = len(merchant.pop("accounts"))
+        merchant["avg_amount"] = merchant["total_spend"] / merchant["txn_count"]
+        merchant["max_amount"] = merchant.pop("max_amount")
+        merchant["min_amount"] = merchant.pop("min_amount")
 
     return merchants
 
@@ -107,55 +121,60 @@ def flag_new_merchant(merchant: Dict, existing_merchants: Optional[Dict] = None)
     return False
 
 
-def detect_merchant_front(merchant_id: str, txns: List[Dict]) -> float:
+def detect_merchant_front(
+    merchant_id: str,
+    txns: List[Dict],
+    merchant_txns: Optional[List[Dict]] = None
+) -> float:
     """
     Score likelihood merchant is front (educational name, non-ed goods).
 
     Args:
         merchant_id: Merchant to analyze
-        txns: List of transactions
+        txns: List of transactions (dicts or TxnViews)
+        merchant_txns: This merchant's transactions, if already filtered
+            (txns is then not scanned)
 
     Returns:
         Front score (0.0 to 1.0)
     """
-    from .category import classify_transaction, NON_EDUCATIONAL_MERCHANTS
-
-    merchant_txns = [t for t in txns if t.get("merchant_id") == merchant_id]
+    if merchant_txns is None:
+        merchant_txns = [t for t in txns if t.get("merchant_id") == merchant_id]
 
     if not merchant_txns:
         return 0.0
 
+    return _merchant_front_score(merchant_txns)
+
+
+def _merchant_front_score(merchant_txns: List[Dict]) -> float:
+    """
+    Classify a merchant's transactions once and derive its front score.
+
+    Args:
+        merchant_txns: This merchant's transactions (non-empty)
+
+    Returns:
+        Front score (0-1)
+    """
+    from .category import _txn_category, NON_ED_MERCHANT_RE
+
     # Get merchant name
     merchant_name = ""
     for txn in merchant_txns:
-        if txn.get("merchant_name"):
-            merchant_name = txn.get("merchant_name", "").lower()
+        name = txn.get("merchant_name")
+        if name:
+            merchant_name = name.lower()
             break
 
     # Check for educational keywords in name
-    educational_name_keywords = [
-        "academy", "school", "learning", "education", "tutor",
-        "curriculum", "study", "college", "prep", "teach"
-    ]
-
     has_educational_name = any(
-        keyword in merchant_name for keyword in educational_name_keywords
+        keyword in merchant_name for keyword in EDUCATIONAL_NAME_KEYWORDS
     )
 
     # Classify transactions
-    non_educational_count = 0
-    total_classified = 0
-
-    for txn in merchant_txns:
-        classification = classify_transaction(txn)
-        total_classified += 1
-        if classification.get("category") == "non_educational":
-            non_educational_count += 1
-
-    if total_classified == 0:
-        return 0.0
-
-    non_ed_ratio = non_educational_count / total_classified
+    n_non_ed = sum(1 for txn in merchant_txns if _txn_category(txn) == "non_educational")
+    non_ed_ratio = n_non_ed / len(merchant_txns)
 
     # Front score: educational name + non-educational transactions
     front_score = 0.0
@@ -165,10 +184,8 @@ def detect_merchant_front(merchant_id: str, txns: List[Dict]) -> float:
         front_score = non_ed_ratio * 0.8
 
         # Additional penalty for non-educational merchant patterns in name
-        for pattern in NON_EDUCATIONAL_MERCHANTS:
-            if pattern in merchant_name:
-                front_score += 0.2
-                break
+        if NON_ED_MERCHANT_RE.search(merchant_name):
+            front_score += 0.2
     else:
         # Lower front likelihood if name isn't trying to appear educational
         front_score = non_ed_ratio * 0.3
@@ -176,25 +193,46 @@ def detect_merchant_front(merchant_id: str, txns: List[Dict]) -> float:
     return min(1.0, front_score)
 
 
-def compute_merchant_entropy(merchant_id: str, txns: List[Dict]) -> float:
+def compute_merchant_entropy(
+    merchant_id: str,
+    txns: List[Dict],
+    merchant_txns: Optional[List[Dict]] = None
+) -> float:
     """
     Entropy of transaction patterns. Low = suspicious regularity.
 
     Args:
         merchant_id: Merchant to analyze
         txns: List of transactions
+        merchant_txns: This merchant's transactions, if already filtered
+            (txns is then not scanned)
 
     Returns:
         Entropy value (bits)
     """
-    merchant_txns = [t for t in txns if t.get("merchant_id") == merchant_id]
+    if merchant_txns is None:
+        merchant_txns = [t for t in txns if t.get("merchant_id") == merchant_id]
 
     if len(merchant_txns) < 2:
         return 0.0
 
     # Analyze amount distribution
-    amounts = [t.get("amount", 0) for t in merchant_txns]
+    amounts = array("d", [t.get("amount", 0) for t in merchant_txns])
+
+    return _binned_entropy(amounts)
+
 
+def _binned_entropy(amounts: Sequence[float], max_bins: int = 10) -> float:
+    """
+    Shannon entropy (bits) of amounts binned into min(max_bins, n) equal-width bins.
+
+    Args:
+        amounts: Amount values
+        max_bins: Upper bound on the number of bins
+
+    Returns:
+        Entropy value; 0.0 when all amounts are equal
+    """
     if not amounts:
         return 0.0
 
@@ -206,20 +244,24 @@ def compute_merchant_entropy(merchant_id: str, txns: List[Dict]) -> float:
         return 0.0  # All same amount = zero entropy
 
     # Create bins
-    n_bins = min(10, len(amounts))
+    n_bins = min(max_bins, len(amounts))
     bin_width = (max_amount - min_amount) / n_bins
 
-    bins: Dict[int, int] = defaultdict(int)
-    for amount in amounts:
-        bin_idx = int((amount - min_amount) / bin_width) if bin_width > 0 else 0
-        bin_idx = min(bin_idx, n_bins - 1)
-        bins[bin_idx] += 1
+    # Fixed-size counts indexed by bin (no per-amount dict hashing)
+    bins = [0] * n_bins
+    last_bin = n_bins - 1
+    if bin_width > 0:
+        for amount in amounts:
+            bin_idx = int((amount - min_amount) / bin_width)
+            bins[bin_idx if bin_idx < last_bin else last_bin] += 1
+    else:
+        bins[0] = len(amounts)
 
     # Calculate Shannon entropy
-    total = sum(bins.values())
+    total = len(amounts)
     entropy = 0.0
 
-    for count in bins.values():
+    for count in bins:
         if count > 0:
             p = count / total
             entropy -= p * math.log2(p)
@@ -231,7 +273,8 @@ def analyze_merchant(
     merchant_id: str,
     txns: List[Dict],
     existing_merchants: Optional[Dict] = None,
-    tenant_id: str = TENANT_ID
+    tenant_id: str = TENANT_ID,
+    merchant_txns: Optional[List[Dict]] = None
 ) -> Optional[Dict]:
     """
     Full merchant analysis with receipt emission.
@@ -241,27 +284,48 @@ def analyze_merchant(
         txns: All transactions
         existing_merchants: Optional dict of known merchants
         tenant_id: Tenant identifier
+        merchant_txns: This merchant's transactions, if already filtered
+            (e.g. a bucket from one grouping pass over all merchants)
 
     Returns:
         Merchant flag receipt if flagged, None otherwise
     """
-    # Build merchant info
-    merchant_txns = [t for t in txns if t.get("merchant_id") == merchant_id]
+    # Build merchant info (filtered once, shared by the scorers below)
+    if merchant_txns is None:
+        merchant_txns = [t for t in txns if t.get("merchant_id") == merchant_id]
+
+    is_new = existing_merchants is None or merchant_id not in existing_merchants
+    receipt_data = _merchant_flag_data(merchant_id, merchant_txns, is_new)
 
+    if receipt_data is None:
+        return None
+
+    return emit_receipt("merchant_flag", receipt_data, tenant_id)
+
+
+def _merchant_flag_data(merchant_id: str, merchant_txns: List[Dict], is_new: bool) -> Optional[Dict]:
+    """
+    Scores and flag reasons for one merchant's transactions.
+
+    Returns:
+        merchant_flag receipt data if flagged, None otherwise
+    """
     if not merchant_txns:
         return None
 
     # Get merchant info from first transaction
     merchant_name = merchant_txns[0].get("merchant_name", "")
-    total_spend = sum(t.get("amount", 0) for t in merchant_txns)
     txn_count = len(merchant_txns)
 
+    # One amounts column feeds both the spend total and the entropy
+    amounts = array("d", [t.get("amount", 0) for t in merchant_txns])
+    total_spend = math.fsum(amounts)
+
     # Calculate scores
-    front_score = detect_merchant_front(merchant_id, txns)
-    entropy = compute_merchant_entropy(merchant_id, txns)
+    front_score = _merchant_front_score(merchant_txns)
+    entropy = _binned_entropy(amounts) if txn_count >= 2 else 0.0
 
     # Determine if should flag
-    is_new = existing_merchants is None or merchant_id not in existing_merchants
     high_volume = total_spend >= MERCHANT_REVIEW_THRESHOLD
     suspected_front = front_score >= MERCHANT_FRONT_THRESHOLD
     low_entropy = entropy < 1.0 and txn_count >= 5
@@ -290,4 +354,57 @@ def analyze_merchant(
         "risk_level": get_risk_level(front_score)
     }
 
-    return emit_receipt("merchant_flag", receipt_data, tenant_id)
+    return receipt_data
+
+
+def _index_by_merchant(txns: List[Dict]) -> Dict[str, List[Dict]]:
+    """Group transactions by merchant_id in first-seen order (falsy IDs skipped)."""
+    by_merchant: Dict[str, List[Dict]] = defaultdict(list)
+    for txn in txns:
+        merchant_id = txn.get("merchant_id")
+        if merchant_id:
+            by_merchant[merchant_id].append(txn)
+    return by_merchant
+
+
+def analyze_all_merchants(
+    txns: List[Dict],
+    existing_merchants: Optional[Dict] = None,
+    tenant_id: str = TENANT_ID,
+    parallel: bool = False,
+    max_workers: Optional[int] = None
+) -> List[Dict]:
+    """
+    Run analyze_merchant for every merchant in txns.
+
+    Transactions are grouped in one pass and each worker receives only its
+    merchant's transactions. Receipts are emitted by the calling process,
+    in first-seen merchant order, so results match a serial run.
+
+    Args:
+        txns: All transactions
+        existing_merchants: Optional dict of known merchants
+        tenant_id: Tenant identifier
+        parallel: Opt in to scoring merchants in a spawn process pool when
+            there are more than MERCHANT_PARALLEL_MIN and more than one
+            CPU (the caller's main module must be safe to re-import)
+        max_workers: Pool size (default: CPU count)
+
+    Returns:
+        List of merchant_flag receipts for flagged merchants
+    """
+    by_merchant = _index_by_merchant(txns)
+    tasks = [
+        (merchant_id, merchant_txns, existing_merchants is None or merchant_id not in existing_merchants)
+        for merchant_id, merchant_txns in by_merchant.items()
+    ]
+
+    n_workers = max_workers or os.cpu_count() or 1
+
+    if parallel and n_workers > 1 and len(tasks) > MERCHANT_PARALLEL_MIN:
+        with multiprocessing.get_context("spawn").Pool(n_workers) as pool:
+            results = pool.starmap(_merchant_flag_data, tasks, chunksize=max(1, len(tasks) // (4 * n_workers)))
+    else:
+        results = [_merchant_flag_data(*task) for task in tasks]
+
+    return emit_receipts_batch("merchant_flag", [data for data in results if data is not None], tenant_id)
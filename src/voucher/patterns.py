@@ -5,98 +5,214 @@ Detects spending patterns indicating voucher abuse.
 """
 
 import math
+import multiprocessing
+import os
+import re
+from array import array
+from calendar import monthrange
 from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 from ..core import (
     emit_receipt,
+    emit_receipts_batch,
     TENANT_ID,
     ESA_REVIEW_THRESHOLD,
     ESA_EGREGIOUS_KEYWORDS,
-    get_risk_level
+    get_risk_level,
+    mean_std
 )
+from .category import TxnView, _EGREGIOUS_RE, _egregious_search_text, _first_keyword, _text_fields
+
+
+# School months: Sep-May; summer: Jun-Aug; ski season: Dec-Mar
+SCHOOL_MONTHS = (1, 2, 3, 4, 5, 9, 10, 11, 12)
+SUMMER_MONTHS = (6, 7, 8)
+SKI_MONTHS = (1, 2, 3, 12)
+
+# Threshold gaming zone: $1,800-$1,999, just under the review threshold
+THRESHOLD_ZONE_LOW = 0.9 * ESA_REVIEW_THRESHOLD
+THRESHOLD_ZONE_HIGH = ESA_REVIEW_THRESHOLD - 1
+
+# analyze_all_accounts(parallel=True) only uses a process pool above this many accounts
+ACCOUNT_PARALLEL_MIN = 32
+
+# Egregious keywords flagged critical: piano over $1,000, ski
+# equipment/passes at any amount (None = no amount condition)
+_CRITICAL_KEYWORDS: Dict[str, Optional[float]] = {
+    "piano": 1000,
+    "ski": None,
+    "snowbowl": None
+}
+
+# Time suffix _fast_month accepts without the full parser: "THH:MM:SS"
+# (or space-separated), optional 3/6-digit fraction, optional Z/offset
+_ISO_TIME_RE = re.compile(
+    r"[T ](\d\d):(\d\d):(\d\d)(?:\.\d{3}|\.\d{6})?(?:Z|[+-](\d\d):(\d\d))?",
+    re.ASCII
+)
+
 
+def _index_by_account(txns: List[Dict]) -> Dict[Any, List[Dict]]:
+    """Group transactions by account_id in one pass."""
+    by_account: Dict[Any, List[Dict]] = defaultdict(list)
+    for txn in txns:
+        by_account[txn.get("account_id")].append(txn)
+    return by_account
 
-def detect_threshold_gaming(account_id: str, txns: List[Dict]) -> bool:
+
+@dataclass(slots=True)
+class AccountView:
+    """
+    One account's transactions with amounts and months packed into arrays.
+
+    amounts holds each txn's amount as a double (8 bytes per value rather
+    than a float object per dict); months holds the txn month, or 0 when
+    the date is missing or unparseable. txns keeps the original dicts for
+    text checks and evidence.
+    """
+
+    account_id: Any
+    txns: List[Dict]
+    amounts: array
+    months: array
+
+    @classmethod
+    def from_txns(cls, account_id: Any, account_txns: List[Dict]) -> "AccountView":
+        """Build the view in one pass over the account's transactions."""
+        n = len(account_txns)
+        amounts = array("d", [0.0]) * n
+        months = array("b", [0]) * n
+        for i, txn in enumerate(account_txns):
+            amounts[i] = txn.get("amount", 0)
+            months[i] = _get_month(txn) or 0
+        return cls(account_id, account_txns, amounts, months)
+
+
+def detect_threshold_gaming(
+    account_id: str,
+    txns: List[Dict],
+    account_txns: Optional[List[Dict]] = None
+) -> bool:
     """
     Multiple transactions just under $2,000 review threshold.
 
     Args:
         account_id: Account to analyze
         txns: List of transactions
+        account_txns: This account's transactions, if already filtered
+            (txns is then not scanned)
 
     Returns:
         True if threshold gaming detected
     """
-    account_txns = [t for t in txns if t.get("account_id") == account_id]
+    if account_txns is None:
+        account_txns = [t for t in txns if t.get("account_id") == account_id]
 
     if len(account_txns) < 3:
         return False
 
-    # Look for transactions in the $1,800-$1,999 range
-    threshold_zone = 0.9 * ESA_REVIEW_THRESHOLD  # $1,800
-    upper_limit = ESA_REVIEW_THRESHOLD - 1  # $1,999
+    # Only the amounts column is needed; months are never parsed here
+    amounts = array("d", [t.get("amount", 0) for t in account_txns])
+
+    return _threshold_gaming(_count_near_threshold(amounts), len(amounts))
+
+
+def _count_near_threshold(
+    amounts: Sequence[float],
+    low: float = THRESHOLD_ZONE_LOW,
+    high: float = THRESHOLD_ZONE_HIGH
+) -> int:
+    """Number of amounts in the threshold gaming zone (bounds bound at def time)."""
+    # A filtered comprehension beats summing comparison bools in CPython:
+    # the filter runs inside the comprehension loop with no per-item add
+    return len([amount for amount in amounts if low <= amount <= high])
 
-    near_threshold = [
-        t for t in account_txns
-        if threshold_zone <= t.get("amount", 0) <= upper_limit
-    ]
+
+def _threshold_gaming(total_near: int, total_txns: int) -> bool:
+    """Threshold gaming verdict from near-threshold and total txn counts."""
+    if total_txns < 3:
+        return False
 
     # Flag if 3+ transactions just under threshold
-    if len(near_threshold) >= 3:
+    if total_near >= 3:
         return True
 
     # Also check for clustering of amounts
-    total_near = len(near_threshold)
-    total_txns = len(account_txns)
-
     if total_txns >= 5 and total_near / total_txns >= 0.3:
         return True
 
     return False
 
 
-def detect_seasonal_spike(account_id: str, txns: List[Dict]) -> bool:
+def _account_stats(view: AccountView) -> Dict[str, Any]:
+    """
+    Per-account totals read from the view's amounts column.
+
+    Returns:
+        Dict with txn_count, total_amount, near_count (the $1,800-$1,999
+        zone detect_threshold_gaming counts) and near_amounts (the
+        amounts in [$1,800, $2,000) reported as evidence)
+    """
+    low = THRESHOLD_ZONE_LOW
+    high = THRESHOLD_ZONE_HIGH
+    amounts = view.amounts
+
+    near_idx = [i for i, amount in enumerate(amounts) if low <= amount < ESA_REVIEW_THRESHOLD]
+
+    return {
+        "txn_count": len(amounts),
+        "total_amount": math.fsum(amounts),
+        "near_count": len([i for i in near_idx if amounts[i] <= high]),
+        # Evidence keeps the amounts as given (int vs float)
+        "near_amounts": [view.txns[i].get("amount", 0) for i in near_idx]
+    }
+
+
+def detect_seasonal_spike(
+    account_id: str,
+    txns: List[Dict],
+    account_txns: Optional[List[Dict]] = None
+) -> bool:
     """
     Unusual spending at non-school times (summer ski passes).
 
     Args:
         account_id: Account to analyze
         txns: List of transactions
+        account_txns: This account's transactions, if already filtered
+            (txns is then not scanned)
 
     Returns:
         True if seasonal spike detected
     """
-    account_txns = [t for t in txns if t.get("account_id") == account_id]
+    if account_txns is None:
+        account_txns = [t for t in txns if t.get("account_id") == account_id]
 
     if len(account_txns) < 5:
         return False
 
-    # Group by month
-    monthly_spend: Dict[int, float] = defaultdict(float)
-
-    for txn in account_txns:
-        txn_date = txn.get("ts") or txn.get("txn_date")
-        if not txn_date:
-            continue
+    return _seasonal_spike(AccountView.from_txns(account_id, account_txns))
 
-        try:
-            dt = datetime.fromisoformat(txn_date.replace('Z', '+00:00'))
-            month = dt.month
-            monthly_spend[month] += txn.get("amount", 0)
-        except (ValueError, AttributeError):
-            pass
 
-    if not monthly_spend:
+def _seasonal_spike(view: AccountView) -> bool:
+    """Seasonal spike verdict from an account view (see detect_seasonal_spike)."""
+    if len(view.txns) < 5:
         return False
 
-    # School months: Sep-May (9, 10, 11, 12, 1, 2, 3, 4, 5)
-    school_months = {9, 10, 11, 12, 1, 2, 3, 4, 5}
-    summer_months = {6, 7, 8}
+    # Group by month into slots 1-12 (slot 0 collects undated txns)
+    monthly_spend = [0.0] * 13
+    for amount, month in zip(view.amounts, view.months):
+        monthly_spend[month] += amount
+
+    if not any(view.months):
+        return False
 
-    school_spend = sum(monthly_spend.get(m, 0) for m in school_months)
-    summer_spend = sum(monthly_spend.get(m, 0) for m in summer_months)
+    school_spend = sum(monthly_spend[m] for m in SCHOOL_MONTHS)
+    summer_spend = sum(monthly_spend[m] for m in SUMMER_MONTHS)
 
     # Flag if summer spending is disproportionately high
     if summer_spend > 0 and school_spend > 0:
@@ -109,19 +225,17 @@ def detect_seasonal_spike(account_id: str, txns: List[Dict]) -> bool:
             return True
 
     # Also check for large winter purchases (ski season: Dec-Mar)
-    ski_months = {12, 1, 2, 3}
-    ski_spend = sum(monthly_spend.get(m, 0) for m in ski_months)
+    ski_spend = sum(monthly_spend[m] for m in SKI_MONTHS)
 
     if ski_spend > 0:
         # Check if ski-season spending is concentrated
         ski_txns = [
-            t for t in account_txns
-            if _get_month(t) in ski_months
+            t for t, month in zip(view.txns, view.months)
+            if month in SKI_MONTHS
         ]
 
         for txn in ski_txns:
-            desc = str(txn.get("description", "")).lower()
-            merchant = str(txn.get("merchant_name", "")).lower()
+            merchant, desc = _text_fields(txn)
             if "ski" in desc or "ski" in merchant or "snowbowl" in merchant:
                 return True
 
@@ -131,19 +245,74 @@ def detect_seasonal_spike(account_id: str, txns: List[Dict]) -> bool:
 def _get_month(txn: Dict) -> Optional[int]:
     """Extract month from transaction date."""
     txn_date = txn.get("ts") or txn.get("txn_date")
-    if not txn_date:
+    if not txn_date or not isinstance(txn_date, str):
         return None
+    return _parse_month(txn_date)
+
+
+@lru_cache(maxsize=4096)
+def _parse_month(txn_date: str) -> Optional[int]:
+    """
+    Month of an ISO timestamp, or None if unparseable.
+
+    Memoized: batches repeat the same dates, so each distinct string is
+    parsed once.
+    """
+    month = _fast_month(txn_date)
+    if month is not None:
+        return month
+    return _parse_month_iso(txn_date)
+
+
+def _fast_month(txn_date: str) -> Optional[int]:
+    """
+    Month read straight from an ISO "YYYY-MM-DD[THH:MM:SS...]" string.
+
+    The date part is checked (digits, month 1-12, day within the month)
+    and any time part must match _ISO_TIME_RE with in-range fields.
+    Returns None when the string does not look like that, so the caller
+    falls back to the full parser, which accepts or rejects it as before.
+    """
+    if len(txn_date) < 10 or txn_date[4] != "-" or txn_date[7] != "-":
+        return None
+    if len(txn_date) > 10 and not _well_formed_time(txn_date[10:]):
+        return None
+
+    digits = txn_date[:4] + txn_date[5:7] + txn_date[8:10]
+    if not (digits.isascii() and digits.isdigit()):
+        return None
+
+    y, m, d = int(digits[:4]), int(digits[4:6]), int(digits[6:])
+    if y < 1 or not 1 <= m <= 12 or not 1 <= d <= monthrange(y, m)[1]:
+        return None
+    return m
+
+
+def _well_formed_time(time_part: str) -> bool:
+    """Whether an ISO time suffix ("T10:00:00Z", " 10:00:00.123+07:00") is valid."""
+    match = _ISO_TIME_RE.fullmatch(time_part)
+    if match is None:
+        return False
+    hour, minute, second, tz_hour, tz_minute = match.groups()
+    return (
+        int(hour) < 24 and int(minute) < 60 and int(second) < 60
+        and (tz_hour is None or (int(tz_hour) < 24 and int(tz_minute) < 60))
+    )
+
+
+def _parse_month_iso(txn_date: str) -> Optional[int]:
+    """Month via the full ISO parser, or None if unparseable."""
     try:
-        dt = datetime.fromisoformat(txn_date.replace('Z', '+00:00'))
-        return dt.month
-    except (ValueError, AttributeError):
+        return datetime.fromisoformat(txn_date.replace('Z', '+00:00')).month
+    except ValueError:
         return None
 
 
 def compute_peer_deviation(
     account_id: str,
     txns: List[Dict],
-    baseline: Optional[Dict] = None
+    baseline: Optional[Dict] = None,
+    account_txns: Optional[List[Dict]] = None
 ) -> float:
     """
     Compare to peer spending patterns. Return sigma.
@@ -152,11 +321,13 @@ def compute_peer_deviation(
         account_id: Account to analyze
         txns: All transactions
         baseline: Optional baseline stats
+        account_txns: This account's transactions, if already filtered
 
     Returns:
         Deviation in standard deviations
     """
-    account_txns = [t for t in txns if t.get("account_id") == account_id]
+    if account_txns is None:
+        account_txns = [t for t in txns if t.get("account_id") == account_id]
 
     if not account_txns:
         return 0.0
@@ -168,52 +339,77 @@ def compute_peer_deviation(
     # Get or compute baseline
     if baseline is None:
         # Compute from all accounts
-        account_totals: Dict[str, float] = defaultdict(float)
-        account_counts: Dict[str, int] = defaultdict(int)
+        _, baseline = _peer_baseline(txns)
+        if baseline is None:
+            return 0.0
 
-        for txn in txns:
-            acc_id = txn.get("account_id")
-            if acc_id:
-                account_totals[acc_id] += txn.get("amount", 0)
-                account_counts[acc_id] += 1
+    return _peer_sigma(account_total, baseline)
 
-        if not account_totals:
-            return 0.0
 
-        totals = list(account_totals.values())
-        avg_total = sum(totals) / len(totals)
-        std_total = _std(totals)
+def _peer_baseline(txns: List[Dict]) -> Tuple[Dict[str, float], Optional[Dict]]:
+    """
+    Per-account spending totals and their peer baseline.
+
+    Returns:
+        Tuple of (account_id -> total, baseline dict with avg_total and
+        std_total); baseline is None when no transaction has an account
+    """
+    account_totals: Dict[str, float] = defaultdict(float)
+
+    for txn in txns:
+        acc_id = txn.get("account_id")
+        if acc_id:
+            account_totals[acc_id] += txn.get("amount", 0)
+
+    if not account_totals:
+        return account_totals, None
+
+    avg_total, std_total = mean_std(account_totals.values())
+
+    return account_totals, {
+        "avg_total": avg_total,
+        "std_total": std_total
+    }
 
-        baseline = {
-            "avg_total": avg_total,
-            "std_total": std_total
-        }
 
-    # Calculate deviation
+def _peer_sigma(account_total: float, baseline: Dict) -> float:
+    """Deviation of one account total from the peer baseline, in sigmas."""
     std = baseline.get("std_total", 1)
     if std == 0:
         std = 1
 
-    deviation = (account_total - baseline.get("avg_total", 0)) / std
+    return (account_total - baseline.get("avg_total", 0)) / std
 
-    return deviation
 
+def compute_peer_deviations_all(txns: List[Dict]) -> Dict[str, float]:
+    """
+    Peer deviation for every account, with the baseline computed once.
 
-def _std(values: List[float]) -> float:
-    """Calculate standard deviation."""
-    if not values or len(values) < 2:
-        return 1.0
-    mean = sum(values) / len(values)
-    variance = sum((v - mean) ** 2 for v in values) / len(values)
-    return math.sqrt(variance)
+    Use this instead of calling compute_peer_deviation per account, which
+    rebuilds the baseline from all transactions each time.
 
+    Args:
+        txns: All transactions
 
-def flag_egregious_items(txns: List[Dict]) -> List[Dict]:
+    Returns:
+        Dict mapping account_id to deviation in standard deviations
+    """
+    account_totals, baseline = _peer_baseline(txns)
+    if baseline is None:
+        return {}
+
+    return {
+        account_id: _peer_sigma(total, baseline)
+        for account_id, total in account_totals.items()
+    }
+
+
+def flag_egregious_items(txns: List[Union[Dict, TxnView]]) -> List[Dict]:
     """
     Flag documented abuse items (pianos, ski equipment, etc.).
 
     Args:
-        txns: List of transactions
+        txns: List of transactions (dicts or TxnViews)
 
     Returns:
         List of flagged transactions
@@ -221,32 +417,25 @@ def flag_egregious_items(txns: List[Dict]) -> List[Dict]:
     flagged = []
 
     for txn in txns:
-        description = str(txn.get("description", "")).lower()
-        merchant_name = str(txn.get("merchant_name", "")).lower()
-        amount = txn.get("amount", 0)
+        combined_text = _egregious_search_text(txn)
+        if combined_text is None:
+            continue
 
-        combined_text = f"{description} {merchant_name}"
+        amount = txn.get("amount", 0)
 
-        egregious_match = None
-        for keyword in ESA_EGREGIOUS_KEYWORDS:
-            if keyword in combined_text:
-                egregious_match = keyword
-                break
+        # One regex scan rejects clean text; hits report the first listed keyword
+        egregious_match = _first_keyword(ESA_EGREGIOUS_KEYWORDS, _EGREGIOUS_RE, combined_text)
 
         if egregious_match:
-            # Additional checks for specific items
+            # Critical keywords, some only above an amount
             risk_level = "high"
-
-            # Piano over $1,000
-            if egregious_match == "piano" and amount >= 1000:
-                risk_level = "critical"
-
-            # Ski equipment/passes
-            if egregious_match in ["ski", "snowbowl"]:
-                risk_level = "critical"
+            if egregious_match in _CRITICAL_KEYWORDS:
+                min_amount = _CRITICAL_KEYWORDS[egregious_match]
+                if min_amount is None or amount >= min_amount:
+                    risk_level = "critical"
 
             flagged.append({
-                **txn,
+                **(txn.txn if isinstance(txn, TxnView) else txn),
                 "egregious_keyword": egregious_match,
                 "risk_level": risk_level,
                 "flag_reason": f"egregious_item:{egregious_match}"
@@ -255,31 +444,35 @@ def flag_egregious_items(txns: List[Dict]) -> List[Dict]:
     return flagged
 
 
-def analyze_account_patterns(
+def _account_pattern_data(
     account_id: str,
-    txns: List[Dict],
-    tenant_id: str = TENANT_ID
+    account_txns: List[Dict],
+    peer_deviation: float
 ) -> Optional[Dict]:
     """
-    Full pattern analysis with receipt emission.
+    Pattern receipt data for one account, or None if no patterns.
+
+    Only this account's transactions are needed, so the function can run
+    in a worker process (see analyze_all_accounts).
 
     Args:
         account_id: Account to analyze
-        txns: All transactions
-        tenant_id: Tenant identifier
+        account_txns: This account's transactions
+        peer_deviation: Account's peer deviation in sigmas
 
     Returns:
-        Pattern receipt if patterns detected, None otherwise
+        Receipt data dict if patterns detected, None otherwise
     """
-    account_txns = [t for t in txns if t.get("account_id") == account_id]
-
     if not account_txns:
         return None
 
+    # Amounts and months packed once and shared by every check below
+    view = AccountView.from_txns(account_id, account_txns)
+    stats = _account_stats(view)
+
     # Run all pattern checks
-    threshold_gaming = detect_threshold_gaming(account_id, txns)
-    seasonal_spike = detect_seasonal_spike(account_id, txns)
-    peer_deviation = compute_peer_deviation(account_id, txns)
+    threshold_gaming = _threshold_gaming(stats["near_count"], stats["txn_count"])
+    seasonal_spike = _seasonal_spike(view)
     egregious = flag_egregious_items(account_txns)
 
     # Collect detected patterns
@@ -288,10 +481,7 @@ def analyze_account_patterns(
 
     if threshold_gaming:
         patterns.append("threshold_gaming")
-        near_threshold = [
-            t.get("amount") for t in account_txns
-            if 0.9 * ESA_REVIEW_THRESHOLD <= t.get("amount", 0) < ESA_REVIEW_THRESHOLD
-        ]
+        near_threshold = stats["near_amounts"]
         evidence["threshold_gaming"] = {
             "near_threshold_count": len(near_threshold),
             "amounts": near_threshold[:5]
@@ -329,8 +519,98 @@ def analyze_account_patterns(
         "evidence": evidence,
         "risk_level": risk_level,
         "risk_score": min(1.0, risk_score),
-        "txn_count": len(account_txns),
-        "total_amount": sum(t.get("amount", 0) for t in account_txns)
+        "txn_count": stats["txn_count"],
+        "total_amount": stats["total_amount"]
     }
 
+    return receipt_data
+
+
+def analyze_account_patterns(
+    account_id: str,
+    txns: List[Dict],
+    tenant_id: str = TENANT_ID,
+    account_txns: Optional[List[Dict]] = None,
+    peer_sigmas: Optional[Dict[str, float]] = None,
+    peer_sigma: Optional[float] = None
+) -> Optional[Dict]:
+    """
+    Full pattern analysis with receipt emission.
+
+    Args:
+        account_id: Account to analyze
+        txns: All transactions
+        tenant_id: Tenant identifier
+        account_txns: This account's transactions, if already filtered
+            (e.g. a bucket from _index_by_account)
+        peer_sigmas: Result of compute_peer_deviations_all(txns), when
+            analyzing many accounts from the same transactions
+        peer_sigma: This account's peer deviation, if already known;
+            txns is then never scanned for the peer baseline
+
+    Returns:
+        Pattern receipt if patterns detected, None otherwise
+    """
+    # Filtered once and shared by every sub-detector
+    if account_txns is None:
+        account_txns = [t for t in txns if t.get("account_id") == account_id]
+
+    if not account_txns:
+        return None
+
+    if peer_sigma is not None:
+        peer_deviation = peer_sigma
+    elif peer_sigmas is not None and account_id in peer_sigmas:
+        peer_deviation = peer_sigmas[account_id]
+    else:
+        peer_deviation = compute_peer_deviation(account_id, txns, account_txns=account_txns)
+
+    receipt_data = _account_pattern_data(account_id, account_txns, peer_deviation)
+    if receipt_data is None:
+        return None
+
     return emit_receipt("voucher_pattern", receipt_data, tenant_id)
+
+
+def analyze_all_accounts(
+    txns: List[Dict],
+    tenant_id: str = TENANT_ID,
+    parallel: bool = False,
+    max_workers: Optional[int] = None
+) -> List[Dict]:
+    """
+    Run analyze_account_patterns for every account in txns.
+
+    Transactions are grouped in one pass and the peer baseline is computed
+    once; each worker receives only its account's transactions. Receipts
+    are emitted by the calling process, in first-seen account order, so
+    results match a serial run.
+
+    Args:
+        txns: All transactions
+        tenant_id: Tenant identifier
+        parallel: Opt in to analyzing accounts in a spawn process pool when
+            there are more than ACCOUNT_PARALLEL_MIN and more than one CPU
+            (the caller's main module must be safe to re-import)
+        max_workers: Pool size (default: CPU count)
+
+    Returns:
+        List of voucher_pattern receipts for accounts with patterns
+    """
+    by_account = _index_by_account(txns)
+    peer_sigmas = compute_peer_deviations_all(txns)
+    tasks = [
+        (account_id, account_txns, peer_sigmas.get(account_id, 0.0))
+        for account_id, account_txns in by_account.items()
+        if account_id
+    ]
+
+    n_workers = max_workers or os.cpu_count() or 1
+
+    if parallel and n_workers > 1 and len(tasks) > ACCOUNT_PARALLEL_MIN:
+        with multiprocessing.get_context("spawn").Pool(n_workers) as pool:
+            results = pool.starmap(_account_pattern_data, tasks, chunksize=max(1, len(tasks) // (4 * n_workers)))
+    else:
+        results = [_account_pattern_data(*task) for task in tasks]
+
+    return emit_receipts_batch("voucher_pattern", [data for data in results if data is not None], tenant_id)
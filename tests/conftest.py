@@ -1,5 +1,10 @@
 """
 Pytest configuration and fixtures for AzProof tests.
+
+Markers:
+    slow: full multi-scenario simulation runs
+
+For a fast inner loop run `pytest -m "not slow"`.
 """
 
 import os
@@ -10,6 +15,11 @@ import pytest
 os.environ.setdefault("AZPROOF_TEST", "1")
 
 
+def pytest_configure(config):
+    """Register the custom markers used by this suite."""
+    config.addinivalue_line("markers", "slow: full multi-scenario simulation runs")
+
+
 @pytest.fixture
 def temp_ledger():
     """Create a temporary ledger file for testing."""
@@ -23,6 +33,13 @@ def temp_ledger():
         os.unlink(ledger_path)
 
 
+@pytest.fixture(scope="session")
+def category_rules():
+    """Voucher category rules, loaded once per session."""
+    from src.voucher.category import load_category_rules
+    return load_category_rules()
+
+
 @pytest.fixture
 def sample_claim():
     """Sample Medicaid claim for testing."""
@@ -59,9 +76,9 @@ def sample_aihp_claim():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_transaction():
-    """Sample ESA voucher transaction for testing."""
+    """Sample ESA voucher transaction for testing (shared; use txn_factory to vary it)."""
     return {
         "txn_id": "TXN_TEST_001",
         "account_id": "ESA_TEST_001",
@@ -75,8 +92,32 @@ def sample_transaction():
 
 
 @pytest.fixture
+def txn_factory(sample_transaction):
+    """Build copies of sample_transaction with fields overridden."""
+    def _make(**overrides):
+        return {**sample_transaction, **overrides}
+    return _make
+
+
+@pytest.fixture(scope="session")
+def merchant_corpus(sample_transaction):
+    """Ten transactions at the sample merchant with varying amounts (read-only)."""
+    return [
+        {**sample_transaction, "txn_id": f"TXN_{i}", "amount": 100 + i * 50}
+        for i in range(10)
+    ]
+
+
+@pytest.fixture(scope="session")
+def merchant_index(merchant_corpus):
+    """build_merchant_index over merchant_corpus, built once (read-only)."""
+    from src.voucher.merchant import build_merchant_index
+    return build_merchant_index(merchant_corpus)
+
+
+@pytest.fixture(scope="session")
 def sample_egregious_transaction():
-    """Sample non-educational ESA transaction for testing."""
+    """Sample non-educational ESA transaction for testing (shared; do not mutate)."""
     return {
         "txn_id": "TXN_EGREGIOUS_001",
         "account_id": "ESA_TEST_002",
@@ -89,6 +130,12 @@ def sample_egregious_transaction():
     }
 
 
+@pytest.fixture(scope="session")
+def mixed_txns(sample_transaction, sample_egregious_transaction):
+    """One educational and one egregious transaction, on different accounts (read-only)."""
+    return (sample_transaction, sample_egregious_transaction)
+
+
 @pytest.fixture
 def sample_providers():
     """Sample provider list for shell detection testing."""
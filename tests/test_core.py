@@ -4,12 +4,15 @@ Tests for core module.
 
 import pytest
 from src.core import (
+    canonical_bytes,
     dual_hash,
     emit_receipt,
+    emit_receipts_batch,
     merkle,
     StopRule,
     validate_receipt,
     get_risk_level,
+    mean_std,
     TENANT_ID
 )
 
@@ -45,6 +48,22 @@ class TestDualHash:
         result2 = dual_hash("test2")
         assert result1 != result2
 
+    def test_dual_hash_buffer_types(self):
+        """Test dual_hash accepts bytearray and memoryview like bytes."""
+        assert dual_hash(bytearray(b"test")) == dual_hash(b"test")
+        assert dual_hash(memoryview(b"test")) == dual_hash(b"test")
+
+    def test_canonical_bytes_distinguishes_types_and_boundaries(self):
+        """Test canonical encoding keeps types and field boundaries apart."""
+        assert canonical_bytes(["ab", "c"]) != canonical_bytes(["a", "bc"])
+        assert canonical_bytes([1]) != canonical_bytes(["1"])
+        assert canonical_bytes([1]) != canonical_bytes([1.0])
+        assert canonical_bytes([None]) != canonical_bytes(["None"])
+        assert canonical_bytes([10**20]) != canonical_bytes([str(10**20)])
+        assert canonical_bytes([["a"]]) != canonical_bytes(["['a']"])
+        assert canonical_bytes([{"a": 1, "b": [2]}]) == canonical_bytes([{"b": [2], "a": 1}])
+        assert canonical_bytes([{"a": 1}]) != canonical_bytes([{"a": 1, "b": None}])
+
     def test_dual_hash_empty_string(self):
         """Test dual_hash with empty string."""
         result = dual_hash("")
@@ -82,6 +101,14 @@ class TestEmitReceipt:
 
         assert receipt["tenant_id"] == "custom"
 
+    def test_emit_receipts_batch(self):
+        """Test batch emission matches per-payload receipts."""
+        receipts = emit_receipts_batch("test", [{"key": "a"}, {"key": "b"}])
+
+        assert [r["key"] for r in receipts] == ["a", "b"]
+        assert all(r["receipt_type"] == "test" for r in receipts)
+        assert receipts[0]["payload_hash"] == emit_receipt("test", {"key": "a"})["payload_hash"]
+
 
 class TestMerkle:
     """Tests for merkle function."""
@@ -196,3 +223,18 @@ class TestGetRiskLevel:
         """Test critical risk level."""
         assert get_risk_level(0.8) == "critical"
         assert get_risk_level(1.0) == "critical"
+
+
+class TestMeanStd:
+    """Tests for mean_std function."""
+
+    def test_mean_std_population(self):
+        """Test one-pass mean and population std."""
+        mean, std = mean_std(iter([2, 4, 4, 4, 5, 5, 7, 9]))
+        assert mean == pytest.approx(5.0)
+        assert std == pytest.approx(2.0)
+
+    def test_mean_std_small_inputs(self):
+        """Test fewer than two values give std 1.0."""
+        assert mean_std([]) == (0.0, 1.0)
+        assert mean_std([3.5]) == (3.5, 1.0)
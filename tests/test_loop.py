@@ -2,12 +2,15 @@
 Tests for Loop module.
 """
 
+import json
+
 import pytest
-from src.loop.sense import sense_receipts, summarize_activity, filter_by_type
+from src.loop.sense import sense_receipts, summarize_activity, filter_by_type, index_by_type
 from src.loop.harvest import harvest_gaps, rank_gaps, identify_patterns, emit_gap
 from src.loop.genesis import synthesize_helper, validate_blueprint, estimate_savings
 from src.loop.gate import (
     calculate_risk,
+    calculate_risk_batch,
     request_approval,
     check_approval,
     auto_approve,
@@ -19,6 +22,7 @@ from src.loop.effectiveness import (
     measure_effectiveness,
     track_helper,
     retire_helper,
+    get_active_helpers,
     clear_helpers
 )
 from src.loop.cycle import run_cycle, get_cycle_count, reset_cycle_count
@@ -33,6 +37,25 @@ class TestSense:
         # May be empty in test environment
         assert isinstance(receipts, list)
 
+    def test_sense_receipts_sees_new_appends(self):
+        """Test repeated sensing picks up receipts appended in between."""
+        before = sense_receipts(since_minutes=60, receipt_types=["gap"])
+        gap = emit_gap("sense_probe", "loop", 1000, ["step"])
+
+        after = sense_receipts(since_minutes=60, receipt_types=["gap"])
+
+        assert len(after) == len(before) + 1
+        assert after[-1]["payload_hash"] == gap["payload_hash"]
+
+    def test_sensed_receipt_types_are_shared(self):
+        """Test receipts read back from the ledger share one type string."""
+        emit_gap("intern_probe", "loop", 1000, ["step"])
+        emit_gap("intern_probe", "loop", 1000, ["step"])
+
+        gaps = sense_receipts(since_minutes=60, receipt_types=["gap"])
+
+        assert gaps[-1]["receipt_type"] is gaps[-2]["receipt_type"]
+
     def test_summarize_activity(self):
         """Test activity summarization."""
         summary = summarize_activity(minutes=60)
@@ -52,6 +75,10 @@ class TestSense:
         filtered = filter_by_type(receipts, "medicaid_ingest")
         assert len(filtered) == 2
 
+        index = index_by_type(receipts)
+        assert filter_by_type(receipts, "medicaid_ingest", index=index) == filtered
+        assert filter_by_type(receipts, "gap", index=index) == []
+
 
 class TestHarvest:
     """Tests for gap harvesting."""
@@ -92,6 +119,9 @@ class TestHarvest:
         assert len(ranked) == 2  # Two problem types
         assert ranked[0]["problem_type"] == "frequent"  # Higher score
 
+        top = rank_gaps(gaps, top_k=1)
+        assert [g["problem_type"] for g in top] == ["frequent"]
+
     def test_identify_patterns(self):
         """Test pattern identification."""
         gaps = [
@@ -192,6 +222,16 @@ class TestGate:
         risk = calculate_risk(action)
         assert risk > 0.5
 
+    def test_calculate_risk_batch_matches_single(self):
+        """Test batch risk scoring matches per-action scoring."""
+        actions = [
+            {"action": "alert:operator", "validation": {"success_rate": 0.95}},
+            {"action": "Delete_records", "origin": {"gap_count": 2}},
+            {"action": "modify", "risk_score": 0.9}
+        ]
+
+        assert calculate_risk_batch(actions) == [calculate_risk(a) for a in actions]
+
     def test_request_approval(self):
         """Test approval request."""
         blueprint = {"blueprint_id": "TEST_BP", "risk_score": 0.3}
@@ -250,6 +290,15 @@ class TestEffectiveness:
         effectiveness = measure_effectiveness("TEST_HELPER")
         assert effectiveness > 0
 
+    def test_measure_effectiveness_with_entropy(self):
+        """Test entropy readings feed the effectiveness score."""
+        register_helper({"blueprint_id": "TEST_HELPER"})
+
+        for _ in range(4):
+            record_execution("TEST_HELPER", success=True, entropy_before=2.0, entropy_after=1.0)
+
+        assert measure_effectiveness("TEST_HELPER") == pytest.approx(0.6 + 0.4 * 0.5)
+
     def test_retire_helper(self):
         """Test helper retirement."""
         blueprint = {"blueprint_id": "RETIRE_TEST"}
@@ -260,6 +309,20 @@ class TestEffectiveness:
         assert result["status"] == "retired"
         assert result["retirement_reason"] == "test retirement"
 
+    def test_helper_state_is_json_serializable(self):
+        """Test returned helper states serialize like the other receipts."""
+        register_helper({"blueprint_id": "ACTIVE_HELPER"})
+        register_helper({"blueprint_id": "RETIRED_HELPER"})
+        for helper_id in ("ACTIVE_HELPER", "RETIRED_HELPER"):
+            record_execution(helper_id, success=True, entropy_before=2.0, entropy_after=1.5)
+
+        retired = json.loads(json.dumps(retire_helper("RETIRED_HELPER", "done")))
+        active = json.loads(json.dumps(get_active_helpers()))
+
+        assert [h["helper_id"] for h in active] == ["ACTIVE_HELPER"]
+        assert active[0]["entropy_before"] == [2.0]
+        assert retired["entropy_after"] == [1.5]
+
 
 class TestCycle:
     """Tests for main loop cycle."""
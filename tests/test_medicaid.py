@@ -3,7 +3,7 @@ Tests for Medicaid module.
 """
 
 import pytest
-from src.medicaid.ingest import ingest_claim, batch_ingest, validate_claim
+from src.medicaid.ingest import ingest_claim, batch_ingest, batch_validate, validate_claim
 from src.medicaid.network import (
     build_provider_graph,
     detect_clusters,
@@ -24,7 +24,8 @@ from src.medicaid.billing import (
 from src.medicaid.shell import (
     extract_principals,
     build_ownership_graph,
-    detect_shell_clusters
+    detect_shell_clusters,
+    compute_registration_burst
 )
 
 
@@ -58,6 +59,26 @@ class TestClaimValidation:
         assert valid is False
         assert "negative" in reason
 
+    def test_batch_validate_matches_single(self):
+        """Test batch validation gives the same verdicts as per-claim checks."""
+        claims = [
+            {"claim_id": "C1", "provider_id": "P1", "billed_amount": 10, "service_date": "2024-01-01"},
+            {"claim_id": "C2", "provider_id": "P1", "billed_amount": -5},
+            {"provider_id": "P1", "billed_amount": 3},
+            {"claim_id": "C3", "provider_id": "", "billed_amount": 1},
+            {"claim_id": "C4", "provider_id": "P1", "billed_amount": "12"},
+            {"claim_id": "C5", "provider_id": "P1", "billed_amount": 1, "service_date": "not-a-date"},
+            {"claim_id": "C6", "provider_id": "P1", "billed_amount": 2, "service_date": "2024-01-01"},
+        ]
+
+        valid_mask, errors = batch_validate(claims)
+        expected = [validate_claim(c) for c in claims]
+
+        assert valid_mask == [valid for valid, _ in expected]
+        assert [(e["index"], e["reason"]) for e in errors] == [
+            (i, reason) for i, (valid, reason) in enumerate(expected) if not valid
+        ]
+
 
 class TestClaimIngestion:
     """Tests for claim ingestion."""
@@ -77,6 +98,29 @@ class TestClaimIngestion:
 
         assert receipt["aihp_flag"] is True
 
+    def test_claim_hash_ignores_key_order(self, sample_claim):
+        """Test claim_hash covers field values, not dict layout."""
+        reordered = dict(reversed(list(sample_claim.items())))
+        changed = {**sample_claim, "billed_amount": sample_claim["billed_amount"] + 0.01}
+
+        receipt = ingest_claim(sample_claim)
+
+        assert ingest_claim(reordered)["claim_hash"] == receipt["claim_hash"]
+        assert ingest_claim(changed)["claim_hash"] != receipt["claim_hash"]
+
+        # Keys outside the receipt payload are still covered
+        extra = {**sample_claim, "principals": ["OWNER_A"]}
+        assert ingest_claim(extra)["claim_hash"] != receipt["claim_hash"]
+
+    def test_ingest_claim_fast_mode(self, sample_claim):
+        """Test fast mode returns unhashed receipt fields."""
+        receipt = ingest_claim(sample_claim, fast_mode=True)
+
+        assert receipt["receipt_type"] == "medicaid_ingest"
+        assert receipt["claim_hash"] is None
+        assert "payload_hash" not in receipt
+        assert receipt["provider_id"] == sample_claim["provider_id"]
+
     def test_batch_ingest(self, sample_claim):
         """Test batch ingestion."""
         claims = [sample_claim, sample_claim.copy()]
@@ -126,6 +170,24 @@ class TestProviderNetwork:
         entropy = compute_network_entropy(graph)
         assert entropy > 0
 
+    def test_graph_without_materialized_edges(self):
+        """Test analysis reads edge columns when edges are not materialized."""
+        receipts = [
+            {"receipt_type": "medicaid_ingest", "provider_id": p, "patient_id": patient}
+            for p, patient in [("A", "X"), ("B", "X"), ("B", "Y"), ("C", "Y")]
+        ]
+        full = build_provider_graph(receipts)
+        lean = build_provider_graph(receipts, materialize_edges=False)
+
+        assert lean["edges"] == full["edges"]
+        assert lean["n_edges"] == len(lean["edges"]) == full["n_edges"] == 2
+        assert compute_network_entropy(lean) == compute_network_entropy(full)
+        assert detect_clusters(lean)[0]["edge_count"] == 2
+
+        # An edited edge list is what the analysis sees
+        trimmed = dict(full, edges=full["edges"][:1])
+        assert detect_clusters(trimmed, min_size=2)[0]["edge_count"] == 1
+
 
 class TestAIHPDetection:
     """Tests for AIHP exploitation detection."""
@@ -222,3 +284,14 @@ class TestShellDetection:
         assert len(clusters) >= 1
         if clusters:
             assert clusters[0]["n_entities"] >= 5
+
+    def test_compute_registration_burst(self, sample_providers):
+        """Test registration burst counts only same-principal LLCs in window."""
+        providers = sample_providers + [{
+            "provider_id": "LATE_SHELL",
+            "principals": ["SHARED_OWNER"],
+            "registration_date": "2026-06-01T00:00:00Z"
+        }]
+        burst = compute_registration_burst("SHELL_0", providers)
+
+        assert burst == len(sample_providers) - 1
@@ -5,16 +5,20 @@ These tests validate the 6 mandatory scenarios for AzProof.
 """
 
 import pytest
+import src.sim as sim
 from src.sim import (
     run_simulation,
     run_scenario,
     run_all_scenarios,
     SimConfig,
     SimState,
+    SampledIdSet,
+    generate_claim_batch,
     generate_medicaid_claims,
     generate_voucher_txns,
     inject_fraud_pattern,
-    validate_detection
+    validate_detection,
+    validate_state_detection
 )
 
 
@@ -29,6 +33,7 @@ class TestSimConfig:
         assert config.n_providers == 100
         assert config.fraud_rate == 0.15
         assert config.random_seed == 42
+        assert config.exact_metrics is True
 
 
 class TestDataGeneration:
@@ -42,6 +47,18 @@ class TestDataGeneration:
         assert len(fraud_ids) > 0  # Some fraud
         assert len(fraud_ids) < len(claims)  # Not all fraud
 
+    def test_generate_claim_batch(self):
+        """Test columnar claim batch materializes matching rows."""
+        batch = generate_claim_batch(50, fraud_rate=0.5)
+        claims = batch.to_dicts()
+
+        assert len(batch) == len(claims) == 50
+        assert [c["claim_id"] for c in claims] == batch.claim_ids
+        fraud = set(batch.fraud_ids())
+        assert all(c["billed_amount"] >= 5000 for c in claims if c["claim_id"] in fraud)
+        assert [c["service_type"] for c in claims] == batch.service_types
+        assert [c["service_date"] for c in claims] == batch.service_dates
+
     def test_generate_voucher_txns(self):
         """Test voucher transaction generation."""
         txns, fraud_ids = generate_voucher_txns(100, fraud_rate=0.2)
@@ -72,6 +89,36 @@ class TestDataGeneration:
         assert metrics["recall"] == 1.0
         assert metrics["f1"] == 1.0
 
+    def test_validate_detection_sampled(self):
+        """Test sampled ID sets stay bounded and estimate the exact rates."""
+        truth = [f"T{i}" for i in range(20000)]
+        detections = truth[:15000] + [f"F{i}" for i in range(5000)]
+        sampled_truth = SampledIdSet(1000)
+        sampled_truth.update(truth)
+        sampled_detections = SampledIdSet(1000)
+        sampled_detections.update(detections)
+
+        metrics = validate_detection(sampled_detections, sampled_truth)
+
+        assert len(sampled_truth) <= 1000
+        assert len(sampled_detections) <= 1000
+        assert metrics["precision"] == pytest.approx(0.75, abs=0.1)
+        assert metrics["recall"] == pytest.approx(0.75, abs=0.1)
+
+    def test_validate_state_detection_keeps_id_spaces_apart(self):
+        """Test a txn detection never matches a claim with the same ID."""
+        state = SimState()
+        state.ground_truth_claims.update(["X", "C1"])
+        state.detected_claims.add("C1")
+        state.detected_txns.add("X")
+
+        metrics = validate_state_detection(state)
+
+        assert metrics["true_positives"] == 1
+        assert metrics["false_positives"] == 1
+        assert metrics["false_negatives"] == 1
+        assert metrics["sample_rate"] == 1.0
+
     def test_validate_detection_partial(self):
         """Test detection validation with partial detection."""
         detections = ["a", "b", "d"]  # d is false positive
@@ -100,6 +147,14 @@ class TestScenarioBaseline:
         assert len(state.medicaid_receipts) > 0
         assert len(state.voucher_receipts) > 0
 
+    def test_receipt_totals_outlive_window(self):
+        """Test receipt totals keep counting past the bounded windows."""
+        state = run_simulation(SimConfig(n_cycles=30))
+
+        assert len(state.medicaid_receipts) == sim.SIM_RECEIPT_WINDOW
+        assert state.n_medicaid_receipts > sim.SIM_RECEIPT_WINDOW
+        assert state.n_voucher_receipts > sim.SIM_RECEIPT_WINDOW
+
 
 class TestScenarioStress:
     """Tests for STRESS scenario."""
@@ -199,6 +254,23 @@ class TestScenarioGodel:
         assert len(crash_violations) == 0
 
 
+class TestScenarioCache:
+    """Tests for the opt-in scenario result cache."""
+
+    def test_cached_scenario_reuses_state(self, monkeypatch, tmp_path):
+        """Test a cached run returns the stored state without rerunning."""
+        monkeypatch.setenv(sim.SIMCACHE_ENV, "1")
+        monkeypatch.setattr(sim, "SIMCACHE_DIR", str(tmp_path))
+
+        first = run_scenario("GODEL")
+        monkeypatch.setattr(sim, "scenario_godel", lambda: pytest.fail("scenario reran"))
+        second = run_scenario("godel")
+
+        assert len(list(tmp_path.glob("*.pkl"))) == 1
+        assert second.cycle == first.cycle
+        assert second.violations == first.violations
+
+
 class TestRunAllScenarios:
     """Tests for running all scenarios."""
 
@@ -239,6 +311,7 @@ class TestSimState:
 
         assert state.cycle == 0
         assert len(state.medicaid_receipts) == 0
+        assert state.n_medicaid_receipts == 0
         assert len(state.violations) == 0
         assert state.ali_detected is False
 
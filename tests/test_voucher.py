@@ -3,25 +3,71 @@ Tests for Voucher module.
 """
 
 import pytest
-from src.voucher.ingest import ingest_transaction, batch_ingest, validate_transaction
+from src.voucher.ingest import (
+    ingest_transaction,
+    batch_ingest,
+    batch_validate,
+    validate_transaction,
+    build_receipt_indices,
+    extract_txns_by_account,
+    extract_txns_by_merchant
+)
 from src.voucher.category import (
     classify_transaction,
-    load_category_rules,
-    compute_educational_ratio
+    compute_educational_ratio,
+    compute_educational_ratios,
+    normalize_txns,
+    scan_categories,
+    detect_category_gaming,
+    mcc_to_int,
+    TxnView
 )
 from src.voucher.merchant import (
     build_merchant_index,
     flag_new_merchant,
     detect_merchant_front,
-    compute_merchant_entropy
+    compute_merchant_entropy,
+    analyze_merchant,
+    analyze_all_merchants
 )
 from src.voucher.patterns import (
     detect_threshold_gaming,
     detect_seasonal_spike,
-    flag_egregious_items
+    flag_egregious_items,
+    analyze_account_patterns,
+    analyze_all_accounts,
+    AccountView,
+    compute_peer_deviation,
+    compute_peer_deviations_all
 )
 
 
+# Five transactions just under the $2000 review threshold (read-only)
+GAMING_TXNS = tuple(
+    {"txn_id": f"GAME_{i}", "account_id": "GAMER", "amount": 1950 + i}
+    for i in range(5)
+)
+
+
+def _merchant_txns(base):
+    """Three txns for each of 40 merchants, alternating small and large amounts."""
+    return [
+        {
+            **base,
+            "txn_id": f"TXN_{m}_{i}",
+            "merchant_id": f"MER_{m}",
+            "amount": 5000 if m % 2 else 100
+        }
+        for m in range(40)
+        for i in range(3)
+    ]
+
+
+def _strip_ts(receipt):
+    """Receipt without its timestamp, for comparing separate runs."""
+    return {k: v for k, v in receipt.items() if k != "ts"}
+
+
 class TestTransactionValidation:
     """Tests for transaction validation."""
 
@@ -45,6 +91,25 @@ class TestTransactionValidation:
         assert valid is False
         assert "negative" in reason
 
+    def test_batch_validate_matches_single(self):
+        """Test batch validation gives the same verdicts as per-txn checks."""
+        txns = [
+            {"txn_id": "T1", "amount": 10, "txn_date": "2024-01-01"},
+            {"txn_id": "T2", "amount": -5},
+            {"amount": 3},
+            {"txn_id": "T3", "amount": "12"},
+            {"txn_id": "T4", "amount": 1, "txn_date": "not-a-date"},
+            {"txn_id": "T5", "amount": 2, "txn_date": "2024-01-01"},
+        ]
+
+        valid_mask, errors = batch_validate(txns)
+        expected = [validate_transaction(t) for t in txns]
+
+        assert valid_mask == [valid for valid, _ in expected]
+        assert [(e["index"], e["reason"]) for e in errors] == [
+            (i, reason) for i, (valid, reason) in enumerate(expected) if not valid
+        ]
+
 
 class TestTransactionIngestion:
     """Tests for transaction ingestion."""
@@ -56,11 +121,19 @@ class TestTransactionIngestion:
         assert receipt["receipt_type"] == "voucher_ingest"
         assert "txn_hash" in receipt
         assert receipt["amount"] == sample_transaction["amount"]
+        assert receipt["mcc_int"] == 8299
 
-    def test_batch_ingest(self, sample_transaction):
+    def test_txn_hash_covers_whole_record(self, sample_transaction, txn_factory):
+        """Test txn_hash ignores key order but covers every field."""
+        receipt = ingest_transaction(sample_transaction)
+        reordered = dict(reversed(list(sample_transaction.items())))
+
+        assert ingest_transaction(reordered)["txn_hash"] == receipt["txn_hash"]
+        assert ingest_transaction(txn_factory(channel="web"))["txn_hash"] != receipt["txn_hash"]
+
+    def test_batch_ingest(self, sample_transaction, txn_factory):
         """Test batch ingestion."""
-        txns = [sample_transaction, sample_transaction.copy()]
-        txns[1]["txn_id"] = "TXN_002"
+        txns = [sample_transaction, txn_factory(txn_id="TXN_002")]
 
         receipt = batch_ingest(txns)
 
@@ -68,6 +141,23 @@ class TestTransactionIngestion:
         assert receipt["txn_count"] == 2
         assert "merkle_root" in receipt
 
+    def test_extract_with_indices_matches_scan(self):
+        """Test indexed extraction returns the same receipts as a scan."""
+        receipts = [
+            {"receipt_type": "voucher_ingest", "account_id": "A1", "merchant_id": "M1"},
+            {"receipt_type": "voucher_ingest", "account_id": "A2", "merchant_id": "M1"},
+            {"receipt_type": "voucher_batch_ingest", "account_id": "A1"},
+            {"receipt_type": "voucher_ingest", "account_id": "A1", "merchant_id": "M2"},
+        ]
+        indices = build_receipt_indices(receipts)
+
+        for account_id in ("A1", "A2", "A3"):
+            assert extract_txns_by_account(receipts, account_id, indices) == \
+                extract_txns_by_account(receipts, account_id)
+        for merchant_id in ("M1", "M2", "M3"):
+            assert extract_txns_by_merchant(receipts, merchant_id, indices) == \
+                extract_txns_by_merchant(receipts, merchant_id)
+
 
 class TestCategoryClassification:
     """Tests for transaction category classification."""
@@ -88,7 +178,7 @@ class TestCategoryClassification:
         assert result["educational_flag"] is False
         assert result["confidence"] > 0.5
 
-    def test_classify_ski_keywords(self):
+    def test_classify_ski_keywords(self, category_rules):
         """Test classification catches ski keywords."""
         txn = {
             "txn_id": "SKI_TEST",
@@ -99,39 +189,125 @@ class TestCategoryClassification:
         result = classify_transaction(txn)
 
         assert result["category"] == "non_educational"
+        assert result["reason"].split(":", 1)[1] in category_rules["egregious_keywords"]
 
-    def test_load_category_rules(self):
-        """Test loading category rules."""
-        rules = load_category_rules()
+    def test_classify_reports_first_listed_keyword(self):
+        """Test the reported keyword follows list order, not text position."""
+        txn = {
+            "txn_id": "ORDER_TEST",
+            "merchant_name": "Trampoline and Ski Park",
+            "amount": 100,
+            "description": ""
+        }
+        result = classify_transaction(txn)
 
-        assert "educational" in rules
-        assert "non_educational" in rules
-        assert "egregious_keywords" in rules
+        assert result["reason"] == "egregious_keyword:ski"
 
-    def test_compute_educational_ratio(self, sample_transaction, sample_egregious_transaction):
-        """Test educational ratio computation."""
+    def test_normalized_txns_classify_identically(self, sample_transaction, sample_egregious_transaction):
+        """Test precomputed lowercase fields give the same classification."""
         txns = [sample_transaction, sample_egregious_transaction]
+        normalized = normalize_txns(txns)
+
+        assert "_name_lc" not in txns[0]
+        assert normalized[0]["_search_lc"] == "curriculum materials abc learning center"
+        for raw, norm in zip(txns, normalized):
+            assert classify_transaction(norm) == classify_transaction(raw)
+
+    def test_mcc_to_int(self):
+        """Test only four-digit codes convert to integers."""
+        assert mcc_to_int("7999") == 7999
+        assert mcc_to_int(" 0742 ") == 742
+        assert mcc_to_int("742") == -1
+        assert mcc_to_int("") == -1
+        assert mcc_to_int(None) == -1
+
+    def test_gaming_check_uses_mcc_int(self):
+        """Test ingested receipts with mcc_int flag the same as raw txns."""
+        txn = {
+            "txn_id": "TXN_GAME",
+            "merchant_name": "Mountain Resort",
+            "merchant_category_code": "7999",
+            "description": "Ski lesson"
+        }
+        receipt = {**txn, "mcc_int": mcc_to_int(txn["merchant_category_code"])}
+
+        assert len(detect_category_gaming([txn])) == 1
+        assert detect_category_gaming([receipt])[0]["evidence"] == detect_category_gaming([txn])[0]["evidence"]
+
+    def test_txn_views_match_dicts(self, sample_transaction, sample_egregious_transaction):
+        """Test TxnViews give the same results as the dicts they wrap."""
+        gaming = {
+            "txn_id": "TXN_GAME",
+            "account_id": "ESA_TEST_001",
+            "amount": 300,
+            "merchant_name": "Snowbowl",
+            "merchant_category_code": "7941",
+            "description": "Ski lesson tutoring"
+        }
+        txns = [sample_transaction, sample_egregious_transaction, gaming]
+        views = TxnView.batch(txns)
+
+        assert TxnView.batch(views) == views
+        assert views[0].get("merchant_name") == sample_transaction["merchant_name"]
+        for raw, view in zip(txns, views):
+            assert classify_transaction(view) == classify_transaction(raw)
+        assert detect_category_gaming(views) == detect_category_gaming(txns)
+        assert compute_educational_ratio("ESA_TEST_001", views) == compute_educational_ratio("ESA_TEST_001", txns)
+        assert flag_egregious_items(views) == flag_egregious_items(txns)
+
+        by_view = analyze_account_patterns("ESA_TEST_001", views, peer_sigma=0.0)
+        by_dict = analyze_account_patterns("ESA_TEST_001", txns, peer_sigma=0.0)
+        assert by_view["patterns"] == by_dict["patterns"] == ["egregious_item"]
+        assert by_view["evidence"] == by_dict["evidence"]
+
+    def test_scan_categories(self):
+        """Test keyword category scan."""
+        assert scan_categories("ninja tutor academy") == {"egregious", "non_ed_merchant", "edu_indicator"}
+        assert scan_categories("office supplies") == set()
+
+    def test_load_category_rules(self, category_rules):
+        """Test loading category rules."""
+        assert "educational" in category_rules
+        assert "non_educational" in category_rules
+        assert "egregious_keywords" in category_rules
 
-        ratio = compute_educational_ratio(sample_transaction["account_id"], txns)
+    def test_compute_educational_ratio(self, sample_transaction, mixed_txns):
+        """Test educational ratio computation."""
+        ratio = compute_educational_ratio(sample_transaction["account_id"], mixed_txns)
 
         # Only one txn for this account, and it's educational
         assert ratio == 1.0
 
+    def test_compute_educational_ratios(self, mixed_txns):
+        """Test batch ratios match the per-account computation."""
+        ratios = compute_educational_ratios(mixed_txns)
+
+        for account_id, ratio in ratios.items():
+            assert ratio == compute_educational_ratio(account_id, mixed_txns)
+
 
 class TestMerchantAnalysis:
     """Tests for merchant analysis."""
 
-    def test_build_merchant_index(self, sample_transaction):
+    def test_build_merchant_index(self, merchant_corpus, merchant_index):
         """Test building merchant index."""
-        txns = [sample_transaction for _ in range(5)]
+        merchant_id = merchant_corpus[0]["merchant_id"]
+
+        assert merchant_id in merchant_index
+        merchant = merchant_index[merchant_id]
+        assert merchant["txn_count"] == len(merchant_corpus)
+        assert merchant["total_spend"] == sum(t["amount"] for t in merchant_corpus)
+        assert build_merchant_index(merchant_corpus[:5])[merchant_id]["txn_count"] == 5
+
+    def test_merchant_index_counts_accounts_exactly(self, txn_factory):
+        """Test unique_accounts is exact, even for IDs with equal hashes."""
+        txns = [txn_factory(account_id=a) for a in (-1, -2, -1, "ESA_A")]
 
         index = build_merchant_index(txns)
 
-        assert sample_transaction["merchant_id"] in index
-        merchant = index[sample_transaction["merchant_id"]]
-        assert merchant["txn_count"] == 5
+        assert index[txns[0]["merchant_id"]]["unique_accounts"] == 3
 
-    def test_flag_new_merchant_high_volume(self, sample_transaction):
+    def test_flag_new_merchant_high_volume(self, merchant_corpus, merchant_index):
         """Test flagging new high-volume merchant."""
         merchant = {
             "merchant_id": "NEW_MER",
@@ -139,80 +315,158 @@ class TestMerchantAnalysis:
             "unique_accounts": 5
         }
 
-        flagged = flag_new_merchant(merchant)
+        flagged = flag_new_merchant(merchant, merchant_index)
         assert flagged is True
 
-    def test_compute_merchant_entropy(self, sample_transaction):
-        """Test merchant entropy computation."""
-        # Create transactions with varying amounts
-        txns = []
-        for i in range(10):
-            txn = sample_transaction.copy()
-            txn["txn_id"] = f"TXN_{i}"
-            txn["amount"] = 100 + i * 50
-            txns.append(txn)
+        # Known merchants are never new, whatever their volume
+        known = dict(merchant, merchant_id=merchant_corpus[0]["merchant_id"])
+        assert flag_new_merchant(known, merchant_index) is False
 
+    def test_compute_merchant_entropy(self, merchant_corpus):
+        """Test merchant entropy computation."""
         entropy = compute_merchant_entropy(
-            sample_transaction["merchant_id"],
-            txns
+            merchant_corpus[0]["merchant_id"],
+            merchant_corpus
         )
 
         assert entropy >= 0
 
+    def test_analyze_all_merchants_matches_per_merchant(self, sample_egregious_transaction):
+        """Test batch merchant analysis matches per-merchant calls."""
+        txns = _merchant_txns(sample_egregious_transaction)
+
+        expected = [analyze_merchant(f"MER_{m}", txns) for m in range(40)]
+        expected = [_strip_ts(r) for r in expected if r is not None]
+
+        serial = analyze_all_merchants(txns)
+
+        assert expected
+        assert [_strip_ts(r) for r in serial] == expected
+
+    @pytest.mark.slow
+    def test_analyze_all_merchants_pooled(self, sample_egregious_transaction):
+        """Test pooled merchant analysis matches the serial run."""
+        txns = _merchant_txns(sample_egregious_transaction)
+
+        serial = analyze_all_merchants(txns)
+        pooled = analyze_all_merchants(txns, parallel=True, max_workers=2)
+
+        assert [_strip_ts(r) for r in pooled] == [_strip_ts(r) for r in serial]
+
 
 class TestPatternDetection:
     """Tests for spending pattern detection."""
 
     def test_detect_threshold_gaming(self):
         """Test threshold gaming detection."""
-        # Create transactions just under $2000
-        txns = [
-            {"txn_id": f"GAME_{i}", "account_id": "GAMER", "amount": 1950 + i}
-            for i in range(5)
-        ]
-
-        gaming = detect_threshold_gaming("GAMER", txns)
+        gaming = detect_threshold_gaming("GAMER", GAMING_TXNS)
         assert gaming is True
 
     def test_detect_threshold_gaming_normal(self, sample_transaction):
         """Test threshold gaming with normal transactions."""
-        txns = [sample_transaction for _ in range(5)]
+        txns = (sample_transaction,) * 5
 
         gaming = detect_threshold_gaming(sample_transaction["account_id"], txns)
         assert gaming is False
 
-    def test_flag_egregious_items(self, sample_egregious_transaction):
-        """Test flagging egregious items."""
-        txns = [sample_egregious_transaction]
+    def test_prefiltered_account_txns_match_scan(self):
+        """Test passing an account's txns gives the same result as filtering."""
+        txns = [*GAMING_TXNS, {"txn_id": "OTHER", "account_id": "OTHER", "amount": 100}]
+        account_txns = txns[:5]
 
-        flagged = flag_egregious_items(txns)
+        assert detect_threshold_gaming("GAMER", [], account_txns) is True
+        assert detect_seasonal_spike("GAMER", [], account_txns) == detect_seasonal_spike("GAMER", txns)
 
-        assert len(flagged) == 1
-        assert "ski" in flagged[0].get("egregious_keyword", "").lower() or \
-               "snowbowl" in flagged[0].get("egregious_keyword", "").lower()
+        scanned = analyze_account_patterns("GAMER", txns)
+        prefiltered = analyze_account_patterns("GAMER", txns, account_txns=account_txns)
+        assert scanned["patterns"] == prefiltered["patterns"]
+        assert scanned["evidence"] == prefiltered["evidence"]
 
-    def test_flag_egregious_piano(self):
-        """Test flagging piano purchases."""
-        txn = {
+    def test_analysis_reflects_edited_txns(self):
+        """Test analysis reflects edits made to txns between calls."""
+        txns = [dict(t) for t in GAMING_TXNS]
+
+        first = analyze_account_patterns("GAMER", txns, peer_sigma=0.0)
+        assert first["patterns"] == ["threshold_gaming"]
+
+        txns[0]["merchant_name"] = "Snowbowl"
+        changed = analyze_account_patterns("GAMER", txns, peer_sigma=0.0)
+        assert "egregious_item" in changed["patterns"]
+
+    def test_compute_peer_deviations_all(self):
+        """Test batch peer deviations match the per-account computation."""
+        txns = [
+            {"txn_id": f"T{i}", "account_id": f"ACC_{i % 4}", "amount": 100 * (i % 7)}
+            for i in range(40)
+        ]
+
+        sigmas = compute_peer_deviations_all(txns)
+
+        assert set(sigmas) == {"ACC_0", "ACC_1", "ACC_2", "ACC_3"}
+        for account_id, sigma in sigmas.items():
+            assert sigma == compute_peer_deviation(account_id, txns)
+
+    def test_analyze_all_accounts_matches_per_account(self):
+        """Test the all-accounts driver matches per-account analysis."""
+        txns = [*GAMING_TXNS] + [
+            {"txn_id": f"T{i}", "account_id": f"ACC_{i % 3}", "amount": 50 * (i % 5),
+             "merchant_name": "Snowbowl" if i == 4 else "Books"}
+            for i in range(12)
+        ]
+
+        batch = analyze_all_accounts(txns)
+        single = [
+            r for r in (analyze_account_patterns(a, txns) for a in ["GAMER", "ACC_0", "ACC_1", "ACC_2"])
+            if r is not None
+        ]
+
+        assert [r["account_id"] for r in batch] == [r["account_id"] for r in single]
+        assert analyze_account_patterns("GAMER", [], account_txns=txns[:5], peer_sigma=0.0)["patterns"] == ["threshold_gaming"]
+        for b, s in zip(batch, single):
+            assert b["patterns"] == s["patterns"]
+            assert b["evidence"] == s["evidence"]
+            assert b["risk_score"] == s["risk_score"]
+
+    def test_account_view_packs_columns(self):
+        """Test account views pack amounts as doubles and months as ints."""
+        txns = [
+            {"txn_id": "A", "amount": 1950, "ts": "2024-07-04T10:00:00Z"},
+            {"txn_id": "B", "amount": 12.5},
+            {"txn_id": "C", "ts": "not a date"},
+            {"txn_id": "D", "ts": "2024-06-15Tgarbage"}
+        ]
+
+        view = AccountView.from_txns("ACC", txns)
+
+        assert view.amounts.typecode == "d"
+        assert list(view.amounts) == [1950.0, 12.5, 0.0, 0.0]
+        assert list(view.months) == [7, 0, 0, 0]
+        assert view.txns is txns
+
+    @pytest.mark.parametrize("txn,keywords", [
+        ("sample_egregious_transaction", ("ski", "snowbowl")),
+        ({
             "txn_id": "PIANO_TEST",
             "merchant_name": "Piano World",
             "amount": 15000,
             "description": "Grand piano purchase"
-        }
-
-        flagged = flag_egregious_items([txn])
-        assert len(flagged) == 1
-        assert "piano" in flagged[0].get("egregious_keyword", "")
-
-    def test_flag_egregious_ninja(self):
-        """Test flagging ninja gym."""
-        txn = {
+        }, ("piano",)),
+        ({
             "txn_id": "NINJA_TEST",
             "merchant_name": "Ninja Warrior Gym",
             "amount": 500,
             "description": "Ninja gym membership"
-        }
+        }, ("ninja",))
+    ], ids=["ski", "piano", "ninja"])
+    def test_flag_egregious(self, request, category_rules, txn, keywords):
+        """Test flagging egregious items, from dicts and from TxnViews."""
+        if isinstance(txn, str):
+            txn = request.getfixturevalue(txn)
 
         flagged = flag_egregious_items([txn])
+
         assert len(flagged) == 1
-        assert "ninja" in flagged[0].get("egregious_keyword", "")
+        assert flag_egregious_items(TxnView.batch([txn])) == flagged
+        keyword = flagged[0].get("egregious_keyword", "")
+        assert any(k in keyword.lower() for k in keywords)
+        assert keyword in category_rules["egregious_keywords"]